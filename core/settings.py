@@ -125,3 +125,76 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Catalog imports
+# Number of parts written per bulk_create batch (and per transaction) by the bulk importer
+
+IMPORT_BATCH_SIZE = 1000
+
+# Size of the in-process thread pool that runs queued ImportJobs (no external broker).
+# Keep it at 1 on SQLite, which allows a single writer at a time.
+
+IMPORT_WORKERS = 1
+
+# Jobs whose heartbeat (updated on every progress report) is older than this many
+# seconds are treated as abandoned by a restarted worker: each process fails them when
+# it starts its job pool, or run: manage.py reclaim_import_jobs [--requeue]
+
+IMPORT_JOB_STALE_AFTER = 900
+
+# Worker processes that classify, hash and build rows for delta catalog imports
+# (1 = serial). The import's own thread stays the single database writer.
+
+IMPORT_PROCESSES = 1
+IMPORT_SHARD_SIZE = 50
+
+# Seconds a cached part-list count stays valid. Imports and part edits invalidate
+# counts immediately in the process that made them; this bounds staleness elsewhere.
+
+PART_COUNT_CACHE_TIMEOUT = 600
+
+# Seconds the last known count of each filter combination is kept to answer
+# ?count=estimated after the counts were invalidated. It outlives invalidation on
+# purpose, so it is bounded instead: an estimate is never older than this.
+
+PART_COUNT_LAST_TIMEOUT = 86400
+
+# Serve /api/filter-parts/?search= from a Persian-normalized SQLite FTS5 index kept
+# in sync by imports and part saves. Off (or on other databases) it falls back to
+# DRF's icontains SearchFilter. Rebuild with: manage.py rebuild_search_index
+
+PART_SEARCH_FTS = True
+
+# Serve the part list and detail endpoints from the denormalized PartListing table
+# (one row per part with category and car names), kept in sync by imports, admin
+# saves and signals. Off, they read PartUnified. Rebuild with: manage.py rebuild_part_listings
+
+PART_LISTING_READS = True
+
+# Rows fetched per database round trip by the streaming catalog export
+# (/api/parts/export/ and manage.py export_parts); memory does not grow with the catalog.
+
+PART_EXPORT_CHUNK_SIZE = 2000
+
+# Cache for list counts and catalog payloads (brands, categories, category tree,
+# part detail). Edits invalidate them by bumping a version key in this cache, so a
+# bump only reaches the workers that share the backend. Local memory is per process:
+# keep it for a single worker, where other processes serve stale data for at most
+# CATALOG_CACHE_TIMEOUT / PART_COUNT_CACHE_TIMEOUT. With several workers a shared
+# backend (Redis or Memcached) is required:
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#   'LOCATION': 'redis://127.0.0.1:6379',
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'product-manager',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+
+# Upper bound (seconds) on how long another process may serve a stale catalog
+# payload; saves, deletes and imports invalidate them immediately in their own process.
+
+CATALOG_CACHE_TIMEOUT = 3600
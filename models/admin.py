@@ -1,6 +1,6 @@
 from django.contrib import admin
 from mptt.admin import DraggableMPTTAdmin
-from .models import CarBrandsModel, CarsModel, PartCategory, PartUnified
+from .models import CarBrandsModel, CarsModel, PartCategory, PartUnified, ImportJob
 
 
 @admin.register(CarBrandsModel)
@@ -28,9 +28,16 @@ class PartCategoryAdmin(DraggableMPTTAdmin):
 @admin.register(PartUnified)
 class PartUnifiedAdmin(admin.ModelAdmin):
     list_display = (
-        'name', 'commercial_code', 'price', 'part_type', 'turnover', 'inventory', 'has_warranty'
+        'name', 'commercial_code', 'price', 'part_type', 'turnover', 'inventory', 'has_warranty', 'is_active'
     )
-    list_filter = ('part_type', 'turnover', 'has_warranty')
+    list_filter = ('part_type', 'turnover', 'has_warranty', 'is_active')
     search_fields = ('name', 'internal_code', 'commercial_code', 'category_title')
     filter_horizontal = ('cars',)
-    readonly_fields = ('category_title', 'category_url', 'category_description')
+    readonly_fields = ('category_title', 'category_url', 'category_description', 'content_hash')
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'kind', 'state', 'processed_rows', 'rows_per_sec', 'created_at', 'finished_at')
+    list_filter = ('kind', 'state')
+    readonly_fields = ('stats', 'errors', 'created_at', 'started_at', 'finished_at')
@@ -0,0 +1,199 @@
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .caching import abrand_list, acategory_list, apart_detail
+from .counts import apart_count, count_signature, wants_estimated_count
+from .listing import active_parts, filter_category, part_list_queryset
+from .models import PartCategory, PartUnified
+from .search import PartSearchFilter
+from .views import PartUnifiedListAPIView
+
+from core.logs import CustomLogger
+logger = CustomLogger()
+
+
+def json_response(data, status=200):
+    # همان رندر DRF تا خروجی با endpoint های sync بایت به بایت یکسان باشد
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+async def page_response(request, queryset, serializer_class, page_number, page_size, signature=None, estimate=False):
+    """
+    همان پاسخ StandardResultsSetPagination (count, next, previous, results, count_exact)
+    با acount و aiterator؛ None برای شماره صفحه نامعتبر
+    """
+    if signature is None:
+        count, count_exact = await queryset.acount(), True
+    else:
+        count, count_exact = await apart_count(queryset, signature, estimate=estimate)
+    num_pages = max(1, math.ceil(count / page_size))
+    if not 1 <= page_number <= num_pages:
+        return None
+
+    start = (page_number - 1) * page_size
+    rows = [row async for row in queryset[start:start + page_size].aiterator()]
+    url = request.build_absolute_uri()
+    previous_url = None
+    if page_number > 1:
+        previous_url = (
+            remove_query_param(url, 'page') if page_number == 2 else replace_query_param(url, 'page', page_number - 1)
+        )
+    return {
+        "count": count,
+        "next": replace_query_param(url, 'page', page_number + 1) if page_number < num_pages else None,
+        "previous": previous_url,
+        "results": serializer_class(rows, many=True).data,
+        "count_exact": count_exact,
+    }
+
+
+def _positive_int(value, default, maximum=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    if value < 1:
+        return default
+    return min(value, maximum) if maximum else value
+
+
+class AsyncListOfBrandsView(View):
+    '''
+    Async twin of list-brands for ASGI deployments.
+        >>> GET /api/async/list-brands/
+    '''
+    async def get(self, request):
+        try:
+            return json_response(await abrand_list())
+        except Exception as e:
+            logger.log(
+                module_name="products.async_views",
+                class_name="AsyncListOfBrandsView",
+                message="Error fetching brands",
+                error=str(e)
+            )
+            return json_response({"error": "An error occurred while fetching brands."}, status=500)
+
+
+class AsyncCategoryListView(View):
+    '''
+        >>> GET /api/async/categories/
+    '''
+    async def get(self, request):
+        try:
+            return json_response(await acategory_list())
+        except Exception as e:
+            logger.log(
+                module_name="products.async_views",
+                class_name="AsyncCategoryListView",
+                message="Error from list of category",
+                error=str(e)
+            )
+            return json_response({"error": "Category have error"}, status=500)
+
+
+class AsyncPartDetailView(View):
+    '''
+        >>> GET /api/async/part/12/
+    '''
+    async def get(self, request, part_id):
+        try:
+            return json_response(await apart_detail(part_id))
+        except PartUnified.DoesNotExist:
+            return json_response({'error': 'Part not found.'}, status=404)
+
+
+class AsyncPartListView(View):
+    '''
+    Async twin of filter-parts: same query parameters and response.
+        >>> GET /api/async/filter-parts/?category_id=3&page=2&page_size=20
+        >>> GET /api/async/filter-parts/?search=شمع&ordering=-price
+        >>> GET /api/async/filter-parts/?price_min=100000&in_stock=true&ordering=price
+    '''
+    page_size = 10
+    max_page_size = 100
+    # همان فیلدها و backend های جستجو و ترتیب filter-parts
+    search_fields = PartUnifiedListAPIView.search_fields
+    ordering_fields = PartUnifiedListAPIView.ordering_fields
+
+    async def get(self, request):
+        params = request.GET
+        try:
+            queryset, serializer_class, list_filters = part_list_queryset(params)
+        except ValidationError as e:
+            return json_response(e.detail, status=400)
+
+        drf_request = Request(request)
+        # search_enabled فقط بار اول به دیتابیس می‌رود
+        queryset = await sync_to_async(PartSearchFilter().filter_queryset)(drf_request, queryset, self)
+        queryset = OrderingFilter().filter_queryset(drf_request, queryset, self)
+
+        data = await page_response(
+            request, queryset, serializer_class,
+            page_number=_positive_int(params.get('page'), 1),
+            page_size=_positive_int(params.get('page_size'), self.page_size, self.max_page_size),
+            # نتیجه جستجو cache نمی‌شود (تعداد عبارت‌های جستجو نامحدود است)
+            signature=None if params.get('search') else count_signature(category=params.get('category_id'), **list_filters),
+            estimate=wants_estimated_count(params),
+        )
+        if data is None:
+            return json_response({"detail": "Invalid page."}, status=404)
+        return json_response(data)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncProductByCategoryView(View):
+    '''
+        >>> POST /api/async/products_by_category/ {"id": 3, "page": 1, "page_size": 20}
+        >>> POST /api/async/products_by_category/ {"id": 1, "include_descendants": true}
+    '''
+    # مثل APIView های DRF (کلاینت‌ها session/CSRF ندارند)
+    async def post(self, request):
+        try:
+            body = json.loads(request.body or b'{}')
+        except ValueError:
+            return json_response({"error": "Invalid JSON body"}, status=400)
+
+        category_id = body.get('id')
+        if not category_id:
+            return json_response({"error": "Category ID is required"}, status=400)
+        try:
+            category = await PartCategory.objects.aget(id=category_id)
+        except (PartCategory.DoesNotExist, ValueError):
+            return json_response({"error": "Category not found"}, status=404)
+
+        include_descendants = body.get('include_descendants') in (True, 1, '1', 'true', 'True')
+        products, serializer_class = active_parts()
+        products = filter_category(products, category, include_descendants)
+        products = serializer_class.setup_eager_loading(products).order_by('id')
+
+        try:
+            data = await page_response(
+                request, products, serializer_class,
+                page_number=_positive_int(body.get('page'), 1),
+                page_size=_positive_int(body.get('page_size'), 10),
+                signature=count_signature(category=category.id, descendants=1 if include_descendants else None),
+                estimate=wants_estimated_count(body),
+            )
+        except Exception as e:
+            logger.log(
+                module_name="products.async_views",
+                class_name="AsyncProductByCategoryView",
+                message="Error fetching products by category",
+                error=str(e)
+            )
+            return json_response({"error": "An error occurred while fetching products."}, status=500)
+        if data is None:
+            return json_response({"detail": "Invalid page."}, status=404)
+        return json_response(data)
@@ -0,0 +1,160 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .listing import listing_reads_enabled
+from .models import CarBrandsModel, PartCategory, PartListing, PartUnified
+from .serializers import CarBrandWithCarsSerializer, CategorySerializer, PartListingSerializer, PartUnifiedSerializer
+from .tree import build_category_tree
+
+# سقف کهنگی payload ها در process های دیگر؛ در همین process تغییرات فورا version را عوض می‌کنند
+CATALOG_CACHE_TIMEOUT = getattr(settings, "CATALOG_CACHE_TIMEOUT", 3600)
+
+
+class VersionedCache:
+    """
+    A namespace in Django's cache whose keys embed a version number, so one
+    ``bump()`` invalidates every entry of the namespace without deleting keys.
+    """
+
+    def __init__(self, namespace, timeout=CATALOG_CACHE_TIMEOUT):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.version_key = f"{namespace}:version"
+
+    def version(self):
+        # اگر کلید version حذف شده باشد (eviction یا restart)، با زمان فعلی دوباره ساخته می‌شود تا
+        # هیچ‌گاه به عددی برنگردد که کلیدهای قدیمی هنوز با آن در cache هستند
+        return cache.get_or_set(self.version_key, time.time_ns, timeout=None)
+
+    def bump(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), timeout=None)
+
+    def key(self, *parts, version=None):
+        version = self.version() if version is None else version
+        return ":".join([self.namespace, str(version), *(str(part) for part in parts)])
+
+    def get_or_build(self, parts, build):
+        key = self.key(*parts)
+        value = cache.get(key)
+        if value is None:
+            value = build()
+            cache.set(key, value, timeout=self.timeout)
+        return value
+
+    def delete(self, *parts):
+        cache.delete(self.key(*parts))
+
+    def delete_many(self, keys):
+        """
+        Delete the entries of many single-part keys (e.g. part ids) with one version lookup.
+        """
+        version = self.version()
+        cache.delete_many([self.key(key, version=version) for key in keys])
+
+    async def aversion(self):
+        return await cache.aget_or_set(self.version_key, time.time_ns, timeout=None)
+
+    async def akey(self, *parts, version=None):
+        version = await self.aversion() if version is None else version
+        return self.key(*parts, version=version)
+
+    async def aget_or_build(self, parts, build):
+        """
+        Async ``get_or_build``; ``build`` is a coroutine function.
+        """
+        key = await self.akey(*parts)
+        value = await cache.aget(key)
+        if value is None:
+            value = await build()
+            await cache.aset(key, value, timeout=self.timeout)
+        return value
+
+
+BRANDS = VersionedCache("brands")
+CATEGORIES = VersionedCache("categories")
+PARTS = VersionedCache("parts")
+
+
+def brand_list():
+    return BRANDS.get_or_build(("list",), lambda: list(CarBrandWithCarsSerializer(
+        CarBrandWithCarsSerializer.setup_eager_loading(CarBrandsModel.objects.all()), many=True
+    ).data))
+
+
+def category_list():
+    return CATEGORIES.get_or_build(("list",), lambda: list(
+        CategorySerializer(PartCategory.objects.all(), many=True).data
+    ))
+
+
+def category_tree(root=None, depth=None):
+    return CATEGORIES.get_or_build(
+        ("tree", root.pk if root is not None else "", "" if depth is None else depth),
+        lambda: build_category_tree(root, depth),
+    )
+
+
+def _build_part_detail(part_id):
+    if listing_reads_enabled():
+        # یک کوئری تک‌جدولی روی read model
+        try:
+            row = PartListingSerializer.setup_eager_loading(PartListing.objects.filter(is_active=True)).get(id=part_id)
+        except PartListing.DoesNotExist:
+            raise PartUnified.DoesNotExist(f"Part {part_id} does not exist.")
+        return PartListingSerializer(row).data
+    return dict(PartUnifiedSerializer(
+        PartUnifiedSerializer.setup_eager_loading(PartUnified.objects.filter(is_active=True)).get(id=part_id)
+    ).data)
+
+
+def part_detail(part_id):
+    """
+    payload جزئیات یک محصول فعال؛ برای id ناموجود یا غیرفعال PartUnified.DoesNotExist
+    (و چیزی cache نمی‌شود)
+    """
+    return PARTS.get_or_build((part_id,), lambda: _build_part_detail(part_id))
+
+
+async def abrand_list():
+    async def build():
+        brands = [brand async for brand in CarBrandWithCarsSerializer.setup_eager_loading(CarBrandsModel.objects.all())]
+        return list(CarBrandWithCarsSerializer(brands, many=True).data)
+    return await BRANDS.aget_or_build(("list",), build)
+
+
+async def acategory_list():
+    async def build():
+        return list(CategorySerializer([category async for category in PartCategory.objects.all()], many=True).data)
+    return await CATEGORIES.aget_or_build(("list",), build)
+
+
+async def apart_detail(part_id):
+    """
+    نسخه async از part_detail (همان کلید cache)
+    """
+    async def build():
+        if listing_reads_enabled():
+            try:
+                row = await PartListingSerializer.setup_eager_loading(PartListing.objects.filter(is_active=True)).aget(id=part_id)
+            except PartListing.DoesNotExist:
+                raise PartUnified.DoesNotExist(f"Part {part_id} does not exist.")
+            return PartListingSerializer(row).data
+        part = await PartUnifiedSerializer.setup_eager_loading(PartUnified.objects.filter(is_active=True)).aget(id=part_id)
+        return dict(PartUnifiedSerializer(part).data)
+    return await PARTS.aget_or_build((part_id,), build)
+
+
+def refresh_catalog_cache():
+    """
+    بعد از import: باطل کردن همه payload های کاتالوگ و ساختن دوباره لیست‌های پرمصرف
+    """
+    for namespace in (BRANDS, CATEGORIES, PARTS):
+        namespace.bump()
+    brand_list()
+    category_list()
+    category_tree()
@@ -0,0 +1,106 @@
+from collections import deque
+from functools import lru_cache
+
+from products.choices.car_data import CATEGORY_KEYWORDS, CATEGORY_PATHS
+
+DEFAULT_CATEGORY_PATH = ["لوازم یدکی"]
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of keywords.
+
+    Each keyword carries a priority (lower wins). ``best_match`` scans a text once
+    and returns the value of the highest-priority keyword occurring anywhere in it.
+    """
+
+    def __init__(self, keywords):
+        # keywords: iterable of (keyword, priority, value)
+        self.goto = [{}]
+        self.fail = [0]
+        self.best = [None]  # (priority, value) بهترین کلمه‌ای که در این گره تمام می‌شود
+        for keyword, priority, value in keywords:
+            if not keyword:
+                continue
+            node = 0
+            for char in keyword:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(None)
+                node = next_node
+            if self.best[node] is None or priority < self.best[node][0]:
+                self.best[node] = (priority, value)
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fallback = self.goto[state].get(char, 0)
+                self.fail[child] = fallback if fallback != child else 0
+                # خروجی گره fail هم در این گره مطابقت دارد؛ فقط بهترین آن نگه داشته می‌شود
+                inherited = self.best[self.fail[child]]
+                if inherited is not None and (self.best[child] is None or inherited[0] < self.best[child][0]):
+                    self.best[child] = inherited
+
+    def best_match(self, text):
+        goto, fail, best = self.goto, self.fail, self.best
+        node = 0
+        found = None
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            hit = best[node]
+            if hit is not None and (found is None or hit[0] < found[0]):
+                found = hit
+                if found[0] == 0:
+                    break
+        return found[1] if found is not None else None
+
+
+def build_category_automaton(category_keywords=CATEGORY_KEYWORDS):
+    """
+    ساخت automaton از CATEGORY_KEYWORDS؛ اولویت هر کلمه ترتیب دسته آن در دیکشنری است
+    تا نتیجه با جستجوی خطی قبلی یکسان باشد
+    """
+    return KeywordAutomaton(
+        (keyword, priority, cat_key)
+        for priority, (cat_key, keywords) in enumerate(category_keywords.items())
+        for keyword in keywords
+    )
+
+
+_category_automaton = build_category_automaton()
+
+
+@lru_cache(maxsize=8192)
+def find_category_path(title):
+    """
+    پیدا کردن مسیر دسته‌بندی از CATEGORY_KEYWORDS و CATEGORY_PATHS بر اساس title داده شده
+    (یک بار پیمایش title با automaton و نگه‌داری نتیجه عنوان‌های تکراری)
+    """
+    cat_key = _category_automaton.best_match(title)
+    if cat_key is None:
+        return DEFAULT_CATEGORY_PATH  # مسیر پیش‌فرض اگر پیدا نشد
+    return CATEGORY_PATHS.get(cat_key, DEFAULT_CATEGORY_PATH)  # مسیر پیش‌فرض
+
+
+def find_category_path_scan(title):
+    """
+    پیاده‌سازی خطی قبلی (دسته × کلمه × طول title)؛ فقط برای تست هم‌ارزی و benchmark
+    """
+    for cat_key, keywords in CATEGORY_KEYWORDS.items():
+        for kw in keywords:
+            if kw in title:
+                return CATEGORY_PATHS.get(cat_key, DEFAULT_CATEGORY_PATH)  # مسیر پیش‌فرض
+    return DEFAULT_CATEGORY_PATH  # مسیر پیش‌فرض اگر پیدا نشد
@@ -0,0 +1,151 @@
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+
+from .caching import VersionedCache
+from .models import PartCategory, PartUnified
+
+# مدت نگه‌داری count ها در cache (ثانیه)؛ سقف کهنگی وقتی cache بین process ها مشترک نیست
+COUNT_CACHE_TIMEOUT = getattr(settings, "PART_COUNT_CACHE_TIMEOUT", 600)
+
+# مدت نگه‌داری آخرین count شناخته‌شده برای count=estimated؛ عمدا بعد از bump باقی می‌ماند، پس محدود است
+LAST_COUNT_TIMEOUT = getattr(settings, "PART_COUNT_LAST_TIMEOUT", 86400)
+
+PART_COUNTS = VersionedCache("part_counts", COUNT_CACHE_TIMEOUT)
+
+
+def count_signature(**filters):
+    """
+    کلید یکتا برای یک ترکیب فیلتر، مثلا part_type=spare|car=5 (فیلترهای خالی حذف می‌شوند)
+    """
+    return "|".join(
+        f"{name}={value}" for name, value in sorted(filters.items()) if value not in (None, "")
+    )
+
+
+def invalidate_part_counts():
+    """
+    همه count های cache شده را باطل می‌کند (بعد از import یا ویرایش محصولات)
+    """
+    PART_COUNTS.bump()
+
+
+def _last_count_key(signature):
+    # بیرون از namespace نسخه‌دار تا بعد از باطل شدن count ها هم تخمین داشته باشیم
+    return f"part_counts:last:{signature}"
+
+
+def wants_estimated_count(params):
+    return params.get("count") == "estimated"
+
+
+def _table_estimate():
+    """
+    تعداد تقریبی ردیف‌های جدول از آمار دیتابیس (بدون اسکن جدول)؛ None اگر آماری نباشد
+    """
+    table = PartUnified._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == "sqlite":
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # بعد از ANALYZE، اولین عدد stat تعداد ردیف‌های جدول است
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+    return None
+
+
+def part_count(queryset, signature, estimate=False):
+    """
+    count یک queryset محصولات با cache بر اساس signature فیلترها.
+    خروجی: (count, exact)؛ exact=False یعنی عدد تخمینی است:
+    آخرین count شناخته‌شده قبل از باطل شدن cache، یا برای لیست بدون فیلتر آمار جدول
+    """
+    key = PART_COUNTS.key(signature)
+    count = cache.get(key)
+    if count is not None:
+        return count, True
+
+    if estimate:
+        count = cache.get(_last_count_key(signature))
+        if count is None and not signature:
+            count = _table_estimate()
+        if count is not None:
+            return count, False
+
+    count = queryset.count()
+    cache.set(key, count, timeout=COUNT_CACHE_TIMEOUT)
+    cache.set(_last_count_key(signature), count, timeout=LAST_COUNT_TIMEOUT)
+    return count, True
+
+
+async def apart_count(queryset, signature, estimate=False):
+    """
+    نسخه async از part_count با cache.aget و queryset.acount (همان کلیدها)
+    """
+    key = await PART_COUNTS.akey(signature)
+    count = await cache.aget(key)
+    if count is not None:
+        return count, True
+
+    if estimate:
+        count = await cache.aget(_last_count_key(signature))
+        if count is None and not signature:
+            count = await sync_to_async(_table_estimate)()
+        if count is not None:
+            return count, False
+
+    count = await queryset.acount()
+    await cache.aset(key, count, timeout=COUNT_CACHE_TIMEOUT)
+    await cache.aset(_last_count_key(signature), count, timeout=LAST_COUNT_TIMEOUT)
+    return count, True
+
+
+def _rollup_category_counts():
+    direct = dict(
+        PartUnified.objects.filter(is_active=True, category__isnull=False)
+        .values_list('category_id').annotate(count=Count('id')).order_by()
+    )
+    subtree = defaultdict(int)
+    # فرزندها قبل از والدها (level نزولی) تا جمع هر گره قبل از افزودن به والدش کامل باشد
+    for category_id, parent_id in PartCategory.objects.order_by('-level').values_list('id', 'parent_id'):
+        subtree[category_id] += direct.get(category_id, 0)
+        if parent_id is not None:
+            subtree[parent_id] += subtree[category_id]
+    return {category_id: (direct.get(category_id, 0), total) for category_id, total in subtree.items()}
+
+
+def category_product_counts():
+    """
+    تعداد محصولات فعال هر دسته: {id: (مستقیم, کل زیردرخت)} در دو کوئری، cache شده تا باطل شدن
+    count ها. count لیست‌های هر دسته (با و بدون زیردسته‌ها) هم از همین مقادیر پر می‌شود
+    """
+    version = PART_COUNTS.version()
+    key = PART_COUNTS.key("category_tree", version=version)
+    counts = cache.get(key)
+    if counts is None:
+        counts = _rollup_category_counts()
+        cache.set(key, counts, timeout=COUNT_CACHE_TIMEOUT)
+        seeded = {}
+        for category_id, (direct, total) in counts.items():
+            seeded[PART_COUNTS.key(count_signature(category=category_id), version=version)] = direct
+            seeded[PART_COUNTS.key(count_signature(category=category_id, descendants=1), version=version)] = total
+        cache.set_many(seeded, timeout=COUNT_CACHE_TIMEOUT)
+    return counts
+
+
+def refresh_part_counts():
+    """
+    بعد از import: باطل کردن count ها و محاسبه دوباره تعداد محصولات درخت دسته‌بندی
+    """
+    invalidate_part_counts()
+    return category_product_counts()
@@ -0,0 +1,128 @@
+import csv
+import json
+import zlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .listing import build_listings, listing_reads_enabled
+from .models import PartListing, PartUnified
+
+# تعداد ردیف‌هایی که هر بار از cursor دیتابیس خوانده می‌شود
+EXPORT_CHUNK_SIZE = getattr(settings, "PART_EXPORT_CHUNK_SIZE", 2000)
+
+EXPORT_FIELDS = (
+    'id', 'name', 'internal_code', 'commercial_code', 'price', 'description', 'image_urls', 'part_type',
+    'turnover', 'inventory', 'has_warranty', 'warranty_name', 'is_active', 'updated_time', 'category_id',
+    'category_path', 'category_title', 'car_names',
+)
+
+EXPORT_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# اندازه تقریبی هر تکه خروجی (کاراکتر) قبل از ارسال به کلاینت یا فایل
+BUFFER_SIZE = 64 * 1024
+
+
+def export_rows(updated_since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    همه محصولات (فعال و غیرفعال) با نام ماشین‌ها و مسیر دسته به صورت dict، به ترتیب id
+    (یا با updated_since به ترتیب زمان تغییر)؛ حافظه مستقل از تعداد ردیف‌ها
+    """
+    ordering = ('updated_time', 'id') if updated_since else ('id',)
+    if listing_reads_enabled():
+        queryset = PartListing.objects.order_by(*ordering)
+        if updated_since:
+            queryset = queryset.filter(updated_time__gte=updated_since)
+        yield from queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+        return
+
+    # بدون read model: ردیف‌های هر chunk با build_listings از جدول‌های اصلی ساخته می‌شوند
+    queryset = PartUnified.objects.order_by(*ordering)
+    if updated_since:
+        queryset = queryset.filter(updated_time__gte=updated_since)
+    chunk = []
+    for part_id in queryset.values_list('id', flat=True).iterator(chunk_size=chunk_size):
+        chunk.append(part_id)
+        if len(chunk) >= chunk_size:
+            yield from _listing_rows(chunk)
+            chunk = []
+    if chunk:
+        yield from _listing_rows(chunk)
+
+
+def _listing_rows(part_ids):
+    listings = {listing.id: listing for listing in build_listings(part_ids)}
+    for part_id in part_ids:
+        listing = listings[part_id]
+        yield {field: getattr(listing, field) for field in EXPORT_FIELDS}
+
+
+def _buffered(lines):
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + "\n"
+
+
+class _Echo:
+    # csv.writer فقط متد write لازم دارد؛ هر ردیف همان لحظه برگردانده می‌شود
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    # لیست‌ها (مسیر دسته، نام ماشین‌ها، آدرس تصاویر) به صورت JSON در یک ستون
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[field]) for field in EXPORT_FIELDS])
+
+
+def gzip_chunks(chunks, level=6):
+    """
+    فشرده‌سازی gzip همزمان با تولید خروجی (بدون نگه داشتن کل فایل در حافظه)
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(output="ndjson", compress=False, updated_since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    خروجی export به صورت تکه‌های bytes برای StreamingHttpResponse یا نوشتن در فایل
+    """
+    lines = (ndjson_lines if output == "ndjson" else csv_lines)(export_rows(updated_since, chunk_size))
+    chunks = (text.encode('utf-8') for text in _buffered(lines))
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_file_name(output="ndjson", compress=False):
+    return f"parts.{output}" + (".gz" if compress else "")
@@ -0,0 +1,72 @@
+# توابع این ماژول به مدل‌های Django وابسته نیستند تا در worker process های import موازی
+# (بدون django.setup) هم قابل اجرا باشند
+import hashlib
+import json
+
+from .classifier import find_category_path
+
+
+def detect_warranty(name):
+    """
+    تشخیص گارانتی از روی نام محصول
+    """
+    has_warranty = "گارانتی" in name
+    warranty_name = "گارانتی پلاس" if "گارانتی پلاس" in name else None
+    return has_warranty, warranty_name
+
+
+def product_content_hash(product, category_path, category_data):
+    """
+    هش محتوای یک محصول فایل (نام، قیمت، ماشین‌ها، دسته‌بندی و تصاویر) برای import افزایشی
+    """
+    payload = [
+        product['name'],
+        int(product['price']),
+        sorted({car for car in product.get('cars', []) if car}),
+        list(category_path),
+        category_data['title'],
+        category_data.get('url', ''),
+        category_data.get('description', ''),
+        category_data.get('images', []),
+    ]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def part_fields(product, category_data):
+    """
+    مقادیر فیلدهای PartUnified برای یک محصول فایل (بدون دسته‌بندی و ماشین‌ها)
+    """
+    has_warranty, warranty_name = detect_warranty(product['name'])
+    return {
+        'name': product['name'],
+        'internal_code': product['ekhtesasiCode'],
+        'commercial_code': product['tegaratCode'],
+        'price': int(product['price']),
+        'category_title': category_data['title'],
+        'category_url': category_data.get('url', ''),
+        'category_description': category_data.get('description', ''),
+        'image_urls': category_data.get('images', []),
+        'has_warranty': has_warranty,
+        'warranty_name': warranty_name,
+    }
+
+
+def prepare_category(category_data):
+    """
+    بخش CPU-bound import یک دسته: پیدا کردن مسیر دسته‌بندی و ساخت فیلدها و هش هر محصول.
+    خروجی: (مسیر دسته‌بندی, [(فیلدها, نام ماشین‌ها), ...])
+    """
+    cat_path = tuple(find_category_path(category_data.get('title', '')))
+    rows = []
+    for product in category_data.get('products') or []:
+        fields = part_fields(product, category_data)
+        fields['content_hash'] = product_content_hash(product, cat_path, category_data)
+        rows.append((fields, product.get('cars', [])))
+    return cat_path, rows
+
+
+def prepare_shard(shard):
+    """
+    آماده‌سازی یک shard (لیستی از دسته‌ها) در یک worker process
+    """
+    return [prepare_category(category_data) for category_data in shard]
@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import ImportJob
+from .tasks import process_uploaded_json_delta, manage_tmkb2b
+from core.logs import CustomLogger
+logger = CustomLogger()
+
+# نوع import بر اساس نام فایل آپلود شده
+IMPORT_KIND_BY_FILE_NAME = {
+    "allData.json": "tmkb2b",
+    "final_output": "catalog",
+}
+
+IMPORTERS = {
+    "catalog": process_uploaded_json_delta,
+    "tmkb2b": manage_tmkb2b,
+}
+
+STAGING_DIR = os.path.join(settings.BASE_DIR, 'models', 'jsonfile')
+
+# بعد از این مدت بدون heartbeat یک job رها شده (مثلا restart شدن worker وسط import) حساب می‌شود (ثانیه)
+STALE_JOB_AFTER = getattr(settings, "IMPORT_JOB_STALE_AFTER", 900)
+
+ABANDONED_JOB_ERROR = "The worker running this job stopped before it finished."
+
+_executor = None
+_executor_lock = threading.Lock()
+# job های queued که به pool همین process داده شده‌اند؛ heartbeat آن‌ها از همین process زده می‌شود
+_pending_jobs = set()
+
+
+def get_executor():
+    """
+    Lazily create the process-wide worker pool that runs import jobs.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # job های process های قبلی (مثلا restart وسط import) پیش از اولین job این process بسته می‌شوند
+            reclaim_stale_jobs()
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMPORT_WORKERS", 1),
+                thread_name_prefix="import-job",
+            )
+    return _executor
+
+
+def submit_job(job_id):
+    """
+    ارسال یک job به worker pool این process؛ تا شروع اجرا heartbeat آن را همین process می‌زند
+    """
+    with _executor_lock:
+        _pending_jobs.add(job_id)
+    return get_executor().submit(run_import_job, job_id)
+
+
+def _touch_pending_jobs():
+    # job های منتظر پشت یک import طولانی رها شده حساب نشوند
+    with _executor_lock:
+        pending = list(_pending_jobs)
+    if pending:
+        ImportJob.objects.filter(pk__in=pending, state='queued').update(updated_time=timezone.now())
+
+
+def reclaim_stale_jobs(stale_after=STALE_JOB_AFTER, requeue=False):
+    """
+    job های queued/running که heartbeat آن‌ها از stale_after قدیمی‌تر است (thread اجراکننده از بین رفته):
+    failed می‌شوند و فایل stage شده حذف می‌شود؛ با requeue اگر فایل هنوز هست دوباره queued می‌شوند.
+    هر job فقط توسط یک process برداشته می‌شود. خروجی: id های job های queued شده برای اجرا
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    requeued = []
+    for job in ImportJob.objects.filter(state__in=('queued', 'running'), updated_time__lt=cutoff):
+        claim = ImportJob.objects.filter(pk=job.pk, state=job.state, updated_time=job.updated_time)
+        if requeue and os.path.exists(job.file_path):
+            if claim.update(state='queued', started_at=None, updated_time=timezone.now()):
+                requeued.append(job.pk)
+            continue
+        if claim.update(
+            state='failed', errors=[ABANDONED_JOB_ERROR], finished_at=timezone.now(), updated_time=timezone.now()
+        ):
+            logger.log(
+                module_name="products.jobs",
+                class_name="reclaim_stale_jobs",
+                message=f"Import job {job.pk} was {job.state} without a heartbeat since {job.updated_time}; failed",
+            )
+            if os.path.exists(job.file_path):
+                os.remove(job.file_path)
+    return requeued
+
+
+def stage_upload(file_obj):
+    """
+    ذخیره فایل آپلود شده با نام یکتا تا آپلودهای هم‌زمان فایل یکدیگر را بازنویسی نکنند
+    """
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    file_name = os.path.basename(file_obj.name)
+    save_path = os.path.join(STAGING_DIR, f"{uuid.uuid4().hex}_{file_name}")
+    with open(save_path, 'wb+') as destination:
+        for chunk in file_obj.chunks():
+            destination.write(chunk)
+    return save_path
+
+
+def enqueue_import(kind, file_name, file_path, options=None):
+    """
+    ثبت یک ImportJob و ارسال آن به worker pool بعد از commit تراکنش جاری
+    options به صورت keyword argument به تابع import داده می‌شود
+    """
+    job = ImportJob.objects.create(
+        kind=kind, file_name=file_name, file_path=file_path, options=options or {}
+    )
+    transaction.on_commit(lambda: submit_job(job.pk))
+    return job
+
+
+def _progress_updater(job_id, started_at, started):
+    def update(report):
+        processed = report.get("rows")
+        if processed is None:
+            processed = sum(report.get(key, 0) for key in ("created", "updated", "unchanged", "skipped"))
+        elapsed = time.perf_counter() - started
+        # فقط اجرای فعلی (اگر job دوباره queued و توسط process دیگری برداشته شده، این اجرا چیزی نمی‌نویسد)
+        ImportJob.objects.filter(pk=job_id, state='running', started_at=started_at).update(
+            processed_rows=processed,
+            rows_per_sec=round(processed / elapsed, 1) if elapsed else 0,
+            stats=report,
+            updated_time=timezone.now(),
+        )
+        _touch_pending_jobs()
+    return update
+
+
+def _execute(job):
+    """
+    برداشتن job (فقط اگر هنوز queued است) و اجرای آن؛ False اگر job را process دیگری برداشته
+    یا reclaim شده باشد
+    """
+    started_at = timezone.now()
+    claimed = ImportJob.objects.filter(pk=job.pk, state='queued').update(
+        state='running', started_at=started_at, updated_time=started_at
+    )
+    with _executor_lock:
+        _pending_jobs.discard(job.pk)
+    if not claimed:
+        logger.log(
+            module_name="products.jobs",
+            class_name="run_import_job",
+            message=f"Import job {job.pk} is no longer queued; skipped",
+        )
+        return False
+
+    update = _progress_updater(job.pk, started_at, time.perf_counter())
+    try:
+        report = IMPORTERS[job.kind](job.file_path, progress=update, **job.options)
+        update(report)
+        errors = report.get("errors", [])
+    except Exception as e:
+        logger.log(
+            module_name="products.jobs",
+            class_name="run_import_job",
+            message=f"Import job {job.pk} crashed",
+            error=str(e)
+        )
+        errors = [str(e)]
+
+    ImportJob.objects.filter(pk=job.pk, state='running', started_at=started_at).update(
+        state='failed' if errors else 'succeeded',
+        errors=errors,
+        finished_at=timezone.now(),
+        updated_time=timezone.now(),
+    )
+    return True
+
+
+def run_import_job(job_id):
+    """
+    اجرای یک ImportJob در thread مربوط به worker pool
+    """
+    close_old_connections()
+    try:
+        job = ImportJob.objects.get(pk=job_id)
+        claimed = False
+        try:
+            claimed = _execute(job)
+        finally:
+            # فایل job برداشته‌نشده مال process دیگری است (یا reclaim آن را حذف کرده)
+            if claimed and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+    except Exception as e:
+        logger.log(
+            module_name="products.jobs",
+            class_name="run_import_job",
+            message=f"Error running import job {job_id}",
+            error=str(e)
+        )
+    finally:
+        # هر thread اتصال دیتابیس خودش را دارد و باید آن را ببندد
+        connection.close()
@@ -0,0 +1,170 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import PartCategory, PartListing, PartUnified
+from .serializers import FastPartUnifiedSerializer, PartListFilterSerializer, PartListingSerializer
+
+# فیلدهایی که بدون تغییر از PartUnified کپی می‌شوند
+COPIED_FIELDS = (
+    'id', 'name', 'internal_code', 'commercial_code', 'price', 'description', 'image_urls', 'part_type',
+    'turnover', 'inventory', 'has_warranty', 'warranty_name', 'is_active', 'updated_time', 'category_id',
+    'category_title',
+)
+
+
+def listing_reads_enabled():
+    return getattr(settings, "PART_LISTING_READS", True)
+
+
+def _category_paths(category_ids):
+    """
+    مسیر نام‌ها از ریشه تا هر دسته با پیمایش parent (نه lft/rght که در طول import به‌روز نیستند)؛
+    هر سطح درخت یک کوئری
+    """
+    nodes = {}
+    missing = set(category_ids) - {None}
+    while missing:
+        parents = set()
+        for category_id, name, parent_id in PartCategory.objects.filter(
+            id__in=missing
+        ).values_list('id', 'name', 'parent_id'):
+            nodes[category_id] = (name, parent_id)
+            parents.add(parent_id)
+        missing = parents - set(nodes) - {None}
+
+    paths = {}
+    for category_id in set(category_ids) - {None}:
+        path = []
+        node_id = category_id
+        while node_id in nodes:
+            name, node_id = nodes[node_id]
+            path.append(name)
+        paths[category_id] = path[::-1]
+    return paths
+
+
+def build_listings(part_ids):
+    """
+    ساخت (بدون ذخیره) ردیف‌های PartListing برای محصولات داده شده
+    """
+    rows = list(PartUnified.objects.filter(id__in=part_ids).values(*COPIED_FIELDS))
+    cars = {}
+    through = PartUnified.cars.through
+    for part_id, car_id, car_name, brand_id in through.objects.filter(
+        partunified_id__in=[row['id'] for row in rows]
+    ).order_by('carsmodel_id').values_list('partunified_id', 'carsmodel_id', 'carsmodel__name', 'carsmodel__brand_id'):
+        cars.setdefault(part_id, []).append((car_id, car_name, brand_id))
+    paths = _category_paths({row['category_id'] for row in rows})
+
+    listings = []
+    for row in rows:
+        part_cars = cars.get(row['id'], [])
+        path = paths.get(row['category_id'], [])
+        listings.append(PartListing(
+            **row,
+            inventory_warning=(
+                PartUnified.LOW_INVENTORY_WARNING if row['inventory'] < PartUnified.LOW_INVENTORY_THRESHOLD else ""
+            ),
+            category_name=path[-1] if path else None,
+            category_path=path,
+            car_ids=[car_id for car_id, _, _ in part_cars],
+            car_names=[car_name for _, car_name, _ in part_cars],
+            brand_ids=sorted({brand_id for _, _, brand_id in part_cars}),
+        ))
+    return listings
+
+
+def refresh_listings(part_ids, batch_size=1000):
+    """
+    بازسازی ردیف‌های read model برای محصولات داده شده؛ ردیف محصولات حذف‌شده هم پاک می‌شود.
+    خروجی تعداد ردیف‌های نوشته شده
+    """
+    part_ids = list(part_ids)
+    total = 0
+    for start in range(0, len(part_ids), batch_size):
+        chunk = part_ids[start:start + batch_size]
+        listings = build_listings(chunk)
+        with transaction.atomic():
+            PartListing.objects.filter(id__in=chunk).delete()
+            PartListing.objects.bulk_create(listings, batch_size=batch_size)
+        total += len(listings)
+    return total
+
+
+def deactivate_listings(part_ids, updated_time):
+    PartListing.objects.filter(id__in=part_ids).update(is_active=False, updated_time=updated_time)
+
+
+def rebuild_listings(batch_size=1000):
+    """
+    ساخت دوباره کل read model از جدول محصولات؛ خروجی تعداد ردیف‌ها
+    """
+    total = 0
+    with transaction.atomic():
+        PartListing.objects.all().delete()
+        chunk = []
+        for part_id in PartUnified.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=batch_size):
+            chunk.append(part_id)
+            if len(chunk) >= batch_size:
+                PartListing.objects.bulk_create(build_listings(chunk), batch_size=batch_size)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            PartListing.objects.bulk_create(build_listings(chunk), batch_size=batch_size)
+            total += len(chunk)
+    return total
+
+
+def filter_part_list(queryset, price_min=None, price_max=None, in_stock=None, inventory_min=None):
+    """
+    فیلترهای بازه قیمت و موجودی لیست محصولات (روی PartListing یا PartUnified)؛
+    بازه‌ها روی ایندکس‌های (price, id) و (category_id, price, id) اجرا می‌شوند
+    """
+    if price_min is not None:
+        queryset = queryset.filter(price__gte=price_min)
+    if price_max is not None:
+        queryset = queryset.filter(price__lte=price_max)
+    if in_stock is not None:
+        queryset = queryset.filter(inventory__gt=0) if in_stock else queryset.filter(inventory__lte=0)
+    if inventory_min is not None:
+        queryset = queryset.filter(inventory__gte=inventory_min)
+    return queryset
+
+
+def active_parts():
+    """
+    (queryset محصولات فعال، serializer لیست) برای endpoint های list و detail:
+    read model تک‌جدولی، یا اگر PART_LISTING_READS خاموش باشد مسیر values روی PartUnified
+    """
+    if listing_reads_enabled():
+        return PartListing.objects.filter(is_active=True), PartListingSerializer
+    return PartUnified.objects.filter(is_active=True), FastPartUnifiedSerializer
+
+
+def filter_category(queryset, category, include_descendants=False):
+    """
+    محدود کردن queryset محصولات (PartListing یا PartUnified) به یک دسته، یا با include_descendants
+    به کل زیردرخت آن: id دسته‌ها با یک subquery بازه‌ای روی lft/rght همان tree
+    """
+    if not include_descendants:
+        return queryset.filter(category_id=category.id)
+    return queryset.filter(category_id__in=PartCategory.objects.filter(
+        tree_id=category.tree_id,
+        lft__gte=category.lft,
+        lft__lte=category.rght,
+    ).values('id'))
+
+
+def part_list_queryset(params):
+    """
+    queryset لیست محصولات (/api/parts/ و نسخه async آن) با فیلتر دسته و بازه‌ها، به ترتیب id.
+    خروجی: (queryset، serializer لیست، فیلترهای بازه معتبر)؛ ValidationError برای فیلتر نامعتبر
+    """
+    queryset, serializer_class = active_parts()
+    queryset = serializer_class.setup_eager_loading(queryset).order_by('id')
+    category_id = params.get('category_id')
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    filters = PartListFilterSerializer(data=params)
+    filters.is_valid(raise_exception=True)
+    return filter_part_list(queryset, **filters.validated_data), serializer_class, filters.validated_data
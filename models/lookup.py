@@ -0,0 +1,104 @@
+from django.db.models import Q, Value
+
+from .listing import listing_reads_enabled
+from .models import PartListing, PartUnified
+from .serializers import PartListingSerializer, PartUnifiedSerializer
+
+# ستون‌های پاسخ فشرده جستجوی کد
+LOOKUP_FIELDS = ('id', 'name', 'commercial_code', 'internal_code', 'price', 'inventory', 'part_type')
+CODE_COLUMNS = {
+    'commercial': ('commercial_code',),
+    'internal': ('internal_code',),
+    'any': ('commercial_code', 'internal_code'),
+}
+
+
+def prefix_range(prefix):
+    """
+    شرط startswith به صورت بازه (prefix <= code < prefix بعدی) تا از ایندکس B-tree استفاده شود؛
+    LIKE در SQLite (case-insensitive) ایندکس را استفاده نمی‌کند
+    """
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def code_condition(column, codes, mode):
+    if mode == 'exact':
+        return Q(**{f"{column}__in": codes})
+    condition = Q()
+    for prefix in codes:
+        low, high = prefix_range(prefix)
+        condition |= Q(**{f"{column}__gte": low, f"{column}__lt": high})
+    return condition
+
+
+def lookup_parts(codes, mode='exact', field='any', limit=100):
+    """
+    جستجوی دقیق چند کد (بدون محدودیت تعداد) یا پیشوندی (حداکثر limit نتیجه برای هر پیشوند)
+    در یک کوئری.
+    خروجی: (نتایج به تفکیک کد درخواستی، کدهایی که پیدا نشدند)
+    """
+    codes = list(dict.fromkeys(codes))
+    columns = CODE_COLUMNS[field]
+    parts = PartUnified.objects.filter(is_active=True).values(*LOOKUP_FIELDS)
+    results = {code: [] for code in codes}
+
+    if mode == 'exact':
+        condition = Q()
+        for column in columns:
+            condition |= code_condition(column, codes, mode)
+        for row in parts.filter(condition).order_by('id'):
+            for code in codes:
+                if any(row[column] == code for column in columns):
+                    results[code].append(row)
+    else:
+        # یک کوئری: UNION ALL یک شاخه برای هر پیشوند. SQLite در شاخه‌های UNION اجازه LIMIT نمی‌دهد،
+        # پس بازه محدود هر پیشوند داخل زیرکوئری id IN (...) است
+        branches = []
+        for prefix in codes:
+            condition = Q()
+            for column in columns:
+                condition |= code_condition(column, [prefix], mode)
+            # بدون ORDER BY، پیمایش ایندکس با رسیدن به limit متوقف می‌شود (به جای sort همه تطابق‌ها)
+            matches = PartUnified.objects.filter(condition, is_active=True).order_by().values('id')[:limit]
+            branches.append(parts.filter(id__in=matches).annotate(lookup_prefix=Value(prefix)).values(
+                *LOOKUP_FIELDS, 'lookup_prefix'
+            ))
+        for row in branches[0].union(*branches[1:], all=True):
+            results[row.pop('lookup_prefix')].append(row)
+    return results, [code for code, matches in results.items() if not matches]
+
+
+def batch_part_details(ids=(), codes=()):
+    """
+    جزئیات چند محصول (همان خروجی part-detail) با id یا کد تجاری در تعداد ثابتی کوئری؛
+    کدی که به چند محصول خورده به قدیمی‌ترین (کمترین id) نگاشت می‌شود.
+    خروجی: (نتایج به تفکیک id و کد درخواستی با None برای پیدا نشده‌ها، id ها و کدهای پیدا نشده)
+    """
+    ids = list(dict.fromkeys(ids))
+    codes = list(dict.fromkeys(codes))
+    if listing_reads_enabled():
+        # یک کوئری تک‌جدولی روی read model
+        queryset, serializer_class = PartListing.objects.all(), PartListingSerializer
+    else:
+        # محصولات با دسته (join) و ماشین‌ها (یک prefetch)
+        queryset, serializer_class = PartUnified.objects.all(), PartUnifiedSerializer
+    # محصولات غیرفعال (حذف‌شده از آخرین import کامل) پیدا نشده گزارش می‌شوند
+    rows = serializer_class.setup_eager_loading(queryset).filter(
+        Q(id__in=ids) | Q(commercial_code__in=codes), is_active=True
+    ).order_by('id')
+
+    by_id = {}
+    by_code = {}
+    for detail in serializer_class(rows, many=True).data:
+        by_id[detail['id']] = detail
+        by_code.setdefault(detail['commercial_code'], detail)
+
+    results = {
+        "ids": {part_id: by_id.get(part_id) for part_id in ids},
+        "codes": {code: by_code.get(code) for code in codes},
+    }
+    not_found = {
+        "ids": [part_id for part_id in ids if part_id not in by_id],
+        "codes": [code for code in codes if code not in by_code],
+    }
+    return results, not_found
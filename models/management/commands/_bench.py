@@ -0,0 +1,131 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+
+from products.choices.car_data import CAR_CHOICES, CATEGORY_KEYWORDS
+from products.tasks import process_uploaded_json_delta
+
+# زیرساخت مشترک دستورهای benchmark_*: دیتابیس موقت، فید مصنوعی و گزارش JSON
+
+TITLE_PREFIXES = ["مجموعه", "قطعه", "کیت", "پک", "واشر", "بست", "پایه", "درپوش"]
+TITLE_SUFFIXES = ["جلو", "عقب", "چپ", "راست", "بالا", "پایین", "کامل", "استاندارد"]
+BRAND_SUFFIXES = ["ایساکو", "ایساکو - گارانتی پلاس", "اصلی", "ایران لوازم قطعه", "ساپکو"]
+
+
+class FeedGenerator:
+    """
+    Writes synthetic feeds shaped like models/jsonfile/final_output_new.json and
+    allData.json, streaming them to disk so that large sizes fit in memory.
+    """
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.keywords = [kw for kws in CATEGORY_KEYWORDS.values() for kw in kws]
+        self.car_names = [fa for _, fa, _ in CAR_CHOICES]
+        # تصاویر تکراری مثل فایل واقعی (یک تصویر چند بار در یک دسته)
+        self.images = [
+            f"https://isaco.ir/sImage/parts/images/{self.random.randint(10000, 99999)}/{n}.jpg"
+            for n in range(500)
+        ]
+
+    def title(self):
+        rnd = self.random
+        return f"{rnd.choice(TITLE_PREFIXES)} {rnd.choice(self.keywords)} {rnd.choice(TITLE_SUFFIXES)}"
+
+    def codes(self, index):
+        return f"29{index:011d}", f"1{index:09d}"
+
+    def catalog(self, path, products, products_per_category=10):
+        rnd = self.random
+        written = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"categories": [\n')
+            first = True
+            while written < products:
+                title = self.title()
+                count = min(rnd.randint(1, products_per_category * 2 - 1), products - written)
+                category = {
+                    "title": title,
+                    "url": f"https://isaco.ir/قطعات/{written}/{title.replace(' ', '-')}",
+                    "description": "",
+                    "images": [rnd.choice(self.images) for _ in range(rnd.randint(0, 4))],
+                    "products": [],
+                }
+                for index in range(written, written + count):
+                    commercial_code, internal_code = self.codes(index)
+                    category["products"].append({
+                        "tegaratCode": commercial_code,
+                        "ekhtesasiCode": internal_code,
+                        "name": f"{title} {rnd.choice(self.car_names)} {rnd.choice(BRAND_SUFFIXES)}",
+                        "cars": rnd.sample(self.car_names, rnd.randint(1, 4)),
+                        "price": str(rnd.randint(10, 5000) * 1000),
+                    })
+                written += count
+                f.write(('' if first else ',\n') + json.dumps(category, ensure_ascii=False))
+                first = False
+            f.write('\n]}\n')
+
+    def tmkb2b(self, path, products, changed_ratio=0.1, new_ratio=0.05):
+        """
+        قیمت/نام بخشی از محصولات کاتالوگ تغییر می‌کند و چند کد جدید اضافه می‌شود؛ خروجی تعداد آیتم‌های فایل
+        """
+        rnd = self.random
+        new_items = int(products * new_ratio)
+        total = products + new_items
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('[\n')
+            for index in range(total):
+                commercial_code, internal_code = self.codes(index)
+                item = {"tegaratCode": commercial_code, "ekhtesasiCode": internal_code}
+                if index >= products or rnd.random() < changed_ratio:
+                    item["name"] = f"{self.title()} {rnd.choice(self.car_names)}"
+                    item["price"] = rnd.randint(10, 5000) * 1000
+                f.write(('' if index == 0 else ',\n') + json.dumps(item, ensure_ascii=False))
+            f.write('\n]\n')
+        return total
+
+
+@contextmanager
+def scratch_database(prefix, keep_files=False, stderr=None):
+    """
+    یک دیتابیس SQLite موقت (همان روال create_test_db) در پوشه‌ای موقت؛ خروجی مسیر پوشه.
+    در پایان دیتابیس حذف و اتصال به دیتابیس اصلی برگردانده می‌شود
+    """
+    work_dir = tempfile.mkdtemp(prefix=prefix)
+    old_name = connection.settings_dict['NAME']
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(work_dir, "scratch.sqlite3")
+    try:
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        yield work_dir
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if keep_files:
+            if stderr is not None:
+                stderr.write(f"Feeds kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def import_catalog(work_dir, products, seed):
+    """
+    ساخت فید کاتالوگ مصنوعی با products محصول و import افزایشی آن در دیتابیس موقت
+    """
+    feed_path = os.path.join(work_dir, "final_output.json")
+    FeedGenerator(seed).catalog(feed_path, products)
+    return process_uploaded_json_delta(feed_path)
+
+
+def write_report(command, report, output=None):
+    """
+    چاپ گزارش JSON و در صورت درخواست نوشتن آن در فایل --output
+    """
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    command.stdout.write(text)
@@ -0,0 +1,145 @@
+import asyncio
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from products.models import PartCategory, PartUnified
+from ._bench import import_catalog, scratch_database, write_report
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a synthetic catalog into a scratch database and drive the read endpoints with "
+        "N concurrent in-process clients: sync views behind a threaded WSGI handler, sync views "
+        "behind the ASGI handler, and the async views behind the ASGI handler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--concurrency', default="100,200", help="Comma separated client counts")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per scenario")
+        parser.add_argument('--wsgi-threads', type=int, default=16,
+                            help="Worker threads of the simulated WSGI server (e.g. gunicorn gthread)")
+        parser.add_argument('--seed', type=int, default=1404)
+        parser.add_argument('--output', help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        with scratch_database("asgi-bench-") as work_dir:
+            import_catalog(work_dir, options['products'], options['seed'])
+            setup_test_environment(debug=False)
+            try:
+                report = self.run(options)
+            finally:
+                teardown_test_environment()
+        write_report(self, report, options['output'])
+
+    def workload(self, options, prefix):
+        """
+        لیست درخواست‌ها (method, url, body) با ترکیب ثابت endpoint ها؛ prefix «» یا «async-»
+        """
+        rnd = random.Random(options['seed'])
+        part_ids = list(PartUnified.objects.filter(is_active=True).values_list('id', flat=True)[:2000])
+        category_ids = list(PartCategory.objects.values_list('id', flat=True))
+        requests = []
+        while len(requests) < options['requests']:
+            kind = rnd.randrange(6)
+            if kind == 0:
+                requests.append(("get", reverse(f"{prefix}list-brands"), None))
+            elif kind == 1:
+                requests.append(("get", reverse(f"{prefix}category-list"), None))
+            elif kind == 2:
+                requests.append(("get", reverse(f"{prefix}parts-list") + f"?page={rnd.randint(1, 20)}&page_size=20", None))
+            elif kind == 3:
+                requests.append(("get", reverse(f"{prefix}parts-list") + "?search=" + rnd.choice(["فیلتر", "لنت", "شمع"]), None))
+            elif kind == 4:
+                requests.append(("get", reverse(f"{prefix}part-detail", args=[rnd.choice(part_ids)]), None))
+            else:
+                requests.append(("post", reverse(f"{prefix}products-by-category"),
+                                 {"id": rnd.choice(category_ids), "page_size": 20}))
+        return requests
+
+    def summary(self, latencies, errors, elapsed):
+        latencies = sorted(latencies)
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "seconds": round(elapsed, 2),
+            "req_per_s": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        }
+
+    def run_wsgi(self, requests, concurrency, threads):
+        """
+        concurrency کلاینت هم‌زمان پشت یک سرور WSGI با threads worker (زمان صف هم حساب می‌شود)
+        """
+        workers = threading.Semaphore(threads)
+        local = threading.local()
+        latencies, errors = [], []
+
+        def call(request):
+            method, url, body = request
+            client = getattr(local, "client", None) or Client()
+            local.client = client
+            start = time.perf_counter()
+            with workers:
+                if method == "get":
+                    response = client.get(url)
+                else:
+                    response = client.post(url, body, content_type="application/json")
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(call, requests))
+        return self.summary(latencies, len(errors), time.perf_counter() - start)
+
+    async def run_asgi(self, requests, concurrency):
+        queue = asyncio.Queue()
+        for request in requests:
+            queue.put_nowait(request)
+        latencies, errors = [], []
+
+        async def client_loop():
+            client = AsyncClient()
+            while not queue.empty():
+                method, url, body = queue.get_nowait()
+                start = time.perf_counter()
+                if method == "get":
+                    response = await client.get(url)
+                else:
+                    response = await client.post(url, body, content_type="application/json")
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors.append(response.status_code)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        return self.summary(latencies, len(errors), time.perf_counter() - start)
+
+    def run(self, options):
+        sync_requests = self.workload(options, "")
+        async_requests = self.workload(options, "async-")
+        report = {
+            "products": PartUnified.objects.count(),
+            "options": {key: options[key] for key in ('concurrency', 'requests', 'wsgi_threads', 'seed')},
+            "concurrency": {},
+        }
+        # یک دور گرم کردن cache ها و اتصال‌ها تا سناریوها شرایط یکسان داشته باشند
+        self.run_wsgi(sync_requests[:200], 8, 8)
+        for concurrency in (int(value) for value in options['concurrency'].split(",")):
+            report["concurrency"][str(concurrency)] = {
+                "wsgi_sync_views": self.run_wsgi(sync_requests, concurrency, options['wsgi_threads']),
+                "asgi_sync_views": asyncio.run(self.run_asgi(sync_requests, concurrency)),
+                "asgi_async_views": asyncio.run(self.run_asgi(async_requests, concurrency)),
+            }
+        return report
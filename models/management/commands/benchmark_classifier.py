@@ -0,0 +1,45 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.classifier import find_category_path, find_category_path_scan
+
+
+class Command(BaseCommand):
+    help = "Benchmark the keyword automaton in find_category_path against the linear keyword scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=os.path.join(settings.BASE_DIR, 'models', 'jsonfile', 'final_output_new.json'),
+            help="Catalog feed whose category titles are classified",
+        )
+        parser.add_argument('--repeat', type=int, default=20, help="Number of passes over the titles")
+
+    def handle(self, *args, **options):
+        with open(options['file'], 'r', encoding='utf-8') as f:
+            titles = [category.get('title', '') for category in json.load(f).get('categories') or []]
+
+        classify_uncached = find_category_path.__wrapped__
+        results = {}
+        for label, classify in (
+            ("linear_scan", find_category_path_scan),
+            ("automaton", classify_uncached),
+            ("automaton_cached", find_category_path),
+        ):
+            find_category_path.cache_clear()
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                for title in titles:
+                    classify(title)
+            elapsed = time.perf_counter() - start
+            calls = len(titles) * options['repeat']
+            results[label] = {
+                "seconds": round(elapsed, 4),
+                "titles_per_sec": round(calls / elapsed, 1) if elapsed else None,
+            }
+
+        self.stdout.write(json.dumps({"titles": len(titles), "repeat": options['repeat'], "results": results}, indent=2))
@@ -0,0 +1,129 @@
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from products.models import PartUnified, PartCategory, CarsModel, CarBrandsModel
+from products.tasks import (
+    process_uploaded_json, process_uploaded_json_bulk, process_uploaded_json_delta, manage_tmkb2b
+)
+from ._bench import FeedGenerator, scratch_database, write_report
+
+CATALOG_IMPORTERS = {
+    "legacy": lambda path, options: process_uploaded_json(path),
+    "bulk": lambda path, options: process_uploaded_json_bulk(path, batch_size=options['batch_size']),
+    "delta": lambda path, options: process_uploaded_json_delta(
+        path, batch_size=options['batch_size'], processes=options['processes']
+    ),
+}
+
+
+@contextmanager
+def count_queries(counter):
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield
+
+
+@contextmanager
+def trace_memory(peak, enabled=True):
+    """
+    بیشینه حافظه تخصیص داده شده توسط پایتون در همین اجرا (کیلوبایت)؛ برخلاف ru_maxrss که برای کل
+    عمر process است و فقط بالا می‌رود. حافظه worker های --processes شمرده نمی‌شود
+    """
+    if not enabled:
+        yield
+        return
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        peak[0] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic catalog/allData feeds and benchmark the importers against a scratch "
+        "database. Prints wall time, rows/sec, peak traced Python memory of each run and query counts "
+        "as JSON. Memory tracing slows the importers; use --no-trace-memory for timings only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default="10000,100000", help="Comma separated product counts")
+        parser.add_argument(
+            '--importers', default="delta",
+            help=f"Comma separated catalog importers to run: {', '.join(CATALOG_IMPORTERS)}",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes for the delta importer")
+        parser.add_argument('--seed', type=int, default=1404)
+        parser.add_argument('--output', help="Also write the JSON report to this file")
+        parser.add_argument('--keep-feeds', action='store_true', help="Keep the generated feeds on disk")
+        parser.add_argument(
+            '--no-trace-memory', action='store_false', dest='trace_memory',
+            help="Skip tracemalloc (peak_memory_kb is null) so wall times are not slowed by tracing",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        importers = [name for name in options['importers'].split(',') if name]
+        unknown = set(importers) - set(CATALOG_IMPORTERS)
+        if unknown:
+            raise CommandError(f"Unknown importers: {', '.join(sorted(unknown))}")
+
+        report = {"options": {key: options[key] for key in ('batch_size', 'processes', 'seed')}, "runs": []}
+        with scratch_database("import-bench-", keep_files=options['keep_feeds'], stderr=self.stderr) as work_dir:
+            for size in sizes:
+                generator = FeedGenerator(options['seed'])
+                catalog_path = os.path.join(work_dir, f"final_output_{size}.json")
+                tmkb2b_path = os.path.join(work_dir, f"allData_{size}.json")
+                generator.catalog(catalog_path, size)
+                tmkb2b_items = generator.tmkb2b(tmkb2b_path, size)
+
+                for name in importers:
+                    self.reset_catalog()
+                    report["runs"].append(self.measure(
+                        name, size, size, lambda: CATALOG_IMPORTERS[name](catalog_path, options),
+                        options['trace_memory'],
+                    ))
+                    # allData روی کاتالوگی اجرا می‌شود که همین الان import شد (با کدهای جدید بیشتر از size)
+                    report["runs"].append(self.measure(
+                        f"tmkb2b_after_{name}", size, tmkb2b_items,
+                        lambda: manage_tmkb2b(tmkb2b_path, batch_size=options['batch_size']),
+                        options['trace_memory'],
+                    ))
+        write_report(self, report, options['output'])
+
+    def reset_catalog(self):
+        PartUnified.objects.all().delete()
+        PartCategory.objects.all().delete()
+        CarsModel.objects.all().delete()
+        CarBrandsModel.objects.all().delete()
+
+    def measure(self, name, size, items, run, trace=True):
+        queries = [0]
+        peak = [None]
+        with trace_memory(peak, trace):
+            start = time.perf_counter()
+            with count_queries(queries):
+                result = run()
+            elapsed = time.perf_counter() - start
+        parts = PartUnified.objects.count()
+        return {
+            "importer": name,
+            "products": size,
+            "items": items,
+            "wall_time": round(elapsed, 3),
+            "rows_per_sec": round(items / elapsed, 1) if elapsed else None,
+            "peak_memory_kb": peak[0],
+            "queries": queries[0],
+            "parts_in_db": parts,
+            "result": result,
+        }
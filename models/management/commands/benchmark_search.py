@@ -0,0 +1,107 @@
+import random
+import statistics
+import time
+from functools import reduce
+from operator import and_, or_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from products.choices.car_data import CATEGORY_KEYWORDS
+from products.models import PartUnified
+from products.search import SEARCH_COLUMNS, search_enabled, search_parts
+from ._bench import import_catalog, scratch_database, write_report
+
+
+def icontains_search(queryset, search):
+    """
+    همان کوئری SearchFilter قبلی: هر کلمه باید در یکی از ستون‌ها (icontains) باشد
+    """
+    return queryset.filter(reduce(and_, (
+        reduce(or_, (Q(**{f"{column}__icontains": term}) for column in SEARCH_COLUMNS))
+        for term in search.split()
+    )))
+
+
+SEARCHERS = {
+    "icontains": icontains_search,
+    "fts5": search_parts,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a synthetic catalog into a scratch database and compare the icontains "
+        "SearchFilter with the FTS5 index: latency of count + first page, and hits per query."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=50, help="Number of distinct search terms")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1404)
+        parser.add_argument('--output', help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        with scratch_database("search-bench-") as work_dir:
+            import_catalog(work_dir, options['products'], options['seed'])
+            report = self.run(options)
+        write_report(self, report, options['output'])
+
+    def terms(self, options):
+        rnd = random.Random(options['seed'])
+        keywords = [kw for kws in CATEGORY_KEYWORDS.values() for kw in kws]
+        names = list(PartUnified.objects.values_list('name', flat=True)[:5000])
+        terms = []
+        while len(terms) < options['queries']:
+            kind = rnd.randrange(4)
+            if kind == 0:
+                terms.append(rnd.choice(keywords))
+            elif kind == 1:
+                # دو کلمه از نام یک محصول واقعی
+                words = rnd.choice(names).split()
+                start = rnd.randrange(max(1, len(words) - 1))
+                terms.append(" ".join(words[start:start + 2]))
+            elif kind == 2:
+                # پیشوند کد تجاری
+                terms.append(f"29{rnd.randrange(10 ** 6):06d}")
+            else:
+                # همان کلمه با ی/ک عربی (icontains این‌ها را پیدا نمی‌کند)
+                terms.append(rnd.choice(keywords).replace("ی", "ي").replace("ک", "ك"))
+        return terms
+
+    def run(self, options):
+        queryset = PartUnified.objects.filter(is_active=True)
+        page_size = options['page_size']
+        terms = self.terms(options)
+        report = {
+            "products": queryset.count(),
+            "fts5_enabled": search_enabled(),
+            "options": {key: options[key] for key in ('queries', 'repeat', 'page_size', 'seed')},
+            "searchers": {},
+        }
+        for name, searcher in SEARCHERS.items():
+            if name == "fts5" and not report["fts5_enabled"]:
+                continue
+            timings = []
+            hits = []
+            for term in terms:
+                best = None
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    results = searcher(queryset, term)
+                    count = results.count()
+                    list(results.values_list('id', flat=True)[:page_size])
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                timings.append(best * 1000)
+                hits.append(count)
+            report["searchers"][name] = {
+                "mean_ms": round(statistics.mean(timings), 2),
+                "p50_ms": round(statistics.median(timings), 2),
+                "max_ms": round(max(timings), 2),
+                "total_hits": sum(hits),
+                "queries_without_hits": sum(1 for count in hits if not count),
+            }
+        return report
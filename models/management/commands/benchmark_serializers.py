@@ -0,0 +1,89 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from products.models import PartListing, PartUnified
+from products.serializers import FastPartUnifiedSerializer, PartListingSerializer, PartUnifiedSerializer
+from ._bench import import_catalog, scratch_database, write_report
+
+# نام مسیر: (serializer، مدل منبع)
+SERIALIZERS = {
+    "model_serializer": (PartUnifiedSerializer, PartUnified),
+    "values": (FastPartUnifiedSerializer, PartUnified),
+    "listing": (PartListingSerializer, PartListing),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a synthetic catalog into a scratch database and compare PartUnifiedSerializer "
+        "with the values()-based FastPartUnifiedSerializer and the PartListing read model: "
+        "rows/s of query + serialize + render per page."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20000)
+        parser.add_argument('--page-sizes', default="20,100,500", help="Comma separated page sizes")
+        parser.add_argument('--pages', type=int, default=20, help="Pages rendered per page size")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=1404)
+        parser.add_argument('--output', help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        with scratch_database("serializer-bench-") as work_dir:
+            import_catalog(work_dir, options['products'], options['seed'])
+            report = self.run(options)
+        write_report(self, report, options['output'])
+
+    def render_page(self, name, start, page_size):
+        serializer_class, model = SERIALIZERS[name]
+        queryset = model.objects.filter(is_active=True).order_by('id')
+        rows = serializer_class.setup_eager_loading(queryset)[start:start + page_size]
+        return JSONRenderer().render(serializer_class(rows, many=True).data)
+
+    def run(self, options):
+        total = PartUnified.objects.filter(is_active=True).count()
+        report = {
+            "products": total,
+            "options": {key: options[key] for key in ('page_sizes', 'pages', 'repeat', 'seed')},
+            "page_sizes": {},
+        }
+        for page_size in (int(size) for size in options['page_sizes'].split(",")):
+            starts = [
+                (n * page_size) % max(1, total - page_size)
+                for n in range(options['pages'])
+            ]
+            # خروجی همه مسیرها باید بایت به بایت یکسان باشد
+            identical = all(
+                len({self.render_page(name, start, page_size) for name in SERIALIZERS}) == 1
+                for start in starts[:3]
+            )
+            results = {"identical_output": identical}
+            for name in SERIALIZERS:
+                timings = []
+                for start in starts:
+                    best = None
+                    for _ in range(options['repeat']):
+                        begin = time.perf_counter()
+                        self.render_page(name, start, page_size)
+                        elapsed = time.perf_counter() - begin
+                        best = elapsed if best is None else min(best, elapsed)
+                    timings.append(best)
+                with CaptureQueriesContext(connection) as queries:
+                    self.render_page(name, starts[0], page_size)
+                results[name] = {
+                    "mean_ms": round(statistics.mean(timings) * 1000, 2),
+                    "p50_ms": round(statistics.median(timings) * 1000, 2),
+                    "rows_per_s": round(page_size * len(timings) / sum(timings)),
+                    "queries_per_page": len(queries),
+                }
+            results["speedup"] = {
+                name: round(results["model_serializer"]["mean_ms"] / max(results[name]["mean_ms"], 0.01), 2)
+                for name in SERIALIZERS if name != "model_serializer"
+            }
+            report["page_sizes"][str(page_size)] = results
+        return report
@@ -0,0 +1,55 @@
+import sys
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from products.export import EXPORT_CHUNK_SIZE, export_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the whole catalog (with category path and car names) to a file as NDJSON or CSV, "
+        "optionally gzipped and limited to parts changed since a date. Memory stays flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, or - for stdout")
+        parser.add_argument('--output-format', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--updated-since', help="ISO date or datetime, e.g. 2025-06-01 or 2025-06-01T12:00:00Z")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def parse_since(self, value):
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"Invalid --updated-since: {value}")
+            since = datetime.combine(day, datetime.min.time())
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        chunks = export_chunks(
+            options['output_format'], options['gzip'], self.parse_since(options['updated_since']),
+            chunk_size=options['chunk_size'],
+        )
+        written = 0
+        if options['path'] == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+                written += len(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(options['path'], 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        self.stdout.write(f"Wrote {written} bytes to {options['path']} in {time.perf_counter() - start:.2f}s")
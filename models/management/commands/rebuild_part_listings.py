@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.listing import rebuild_listings
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized PartListing read model from the PartUnified table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_listings(batch_size=options['batch_size'])
+        self.stdout.write(f"Rebuilt {total} part listings in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.search import rebuild_search_index, search_enabled
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FTS5 part search index from the PartUnified table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_search_index(batch_size=options['batch_size'])
+        if not search_enabled():
+            self.stderr.write("FTS5 search is disabled or unavailable on this database; nothing indexed.")
+            return
+        self.stdout.write(f"Indexed {total} parts in {time.perf_counter() - start:.2f}s")
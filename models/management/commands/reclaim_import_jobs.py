@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from products.jobs import STALE_JOB_AFTER, get_executor, reclaim_stale_jobs, submit_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Fail queued/running import jobs left behind by a restarted worker (no heartbeat for "
+        "--stale-after seconds). With --requeue, jobs whose staged file still exists are run again "
+        "in this process instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale-after', type=int, default=STALE_JOB_AFTER)
+        parser.add_argument('--requeue', action='store_true')
+
+    def handle(self, *args, **options):
+        requeued = reclaim_stale_jobs(stale_after=options['stale_after'], requeue=options['requeue'])
+        if not requeued:
+            self.stdout.write("No import jobs to run again.")
+            return
+        for job_id in requeued:
+            submit_job(job_id)
+        self.stdout.write(f"Running import jobs again: {', '.join(map(str, requeued))}")
+        # منتظر پایان job ها؛ pool همین process است
+        get_executor().shutdown(wait=True)
@@ -35,7 +35,7 @@ class CarsModel(models.Model):
 
 
 class PartCategory(MPTTModel):
-    name = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255)
     parent = TreeForeignKey(
         'self', on_delete=models.CASCADE, null=True, blank=True, related_name='children'
     )
@@ -44,6 +44,20 @@ class PartCategory(MPTTModel):
     class MPTTMeta:
         order_insertion_by = ['name']
 
+    class Meta:
+        # names repeat across branches (e.g. "سایر" under several parents in CATEGORY_PATHS)
+        constraints = [
+            models.UniqueConstraint(fields=['parent', 'name'], name='unique_category_name_per_parent'),
+            # NULL ها در UNIQUE متمایزند؛ یکتایی نام دسته‌های ریشه جدا تضمین می‌شود
+            models.UniqueConstraint(
+                fields=['name'], condition=models.Q(parent__isnull=True), name='unique_root_category_name',
+            ),
+        ]
+        # mptt only adds this index_together itself on Django < 5; subtree range joins need it
+        indexes = [
+            models.Index(fields=['tree_id', 'lft'], name='category_tree_lft_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -62,8 +76,8 @@ class PartUnified(models.Model):
     )
 
     name = models.CharField(max_length=255)
-    internal_code = models.CharField(max_length=50)
-    commercial_code = models.CharField(max_length=50)
+    internal_code = models.CharField(max_length=50, db_index=True)
+    commercial_code = models.CharField(max_length=50, db_index=True)
     price = models.PositiveIntegerField()
     cars = models.ManyToManyField('CarsModel', related_name="parts")
     description = models.TextField(blank=True, null=True)
@@ -113,10 +127,136 @@ class PartUnified(models.Model):
         help_text="Name of the warranty in Persian"
     )
 
+    content_hash = models.CharField(
+        max_length=40,
+        blank=True,
+        default='',
+        help_text="Hash of the imported name, price, cars, category and images (used by delta imports)"
+    )
+    is_active = models.BooleanField(
+        default=True,
+        help_text="False when the part disappeared from the last full catalog import"
+    )
+    updated_time = models.DateTimeField(
+        auto_now=True,
+        help_text="Last change; bulk writes of the importers set it explicitly"
+    )
+
+    class Meta:
+        # ایندکس‌ها بر اساس مسیرهای دسترسی view ها (فیلتر برابری و سپس ترتیب id یا ستون cursor).
+        # همه view ها فقط محصولات فعال را می‌خوانند و SQLite شرط بولی is_active را با ایندکس
+        # معمولی جستجو نمی‌کند، پس ایندکس‌ها partial روی is_active هستند
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(is_active=True), name='part_active_id_idx'),
+            models.Index(fields=['part_type', 'id'], condition=models.Q(is_active=True), name='part_active_type_id_idx'),
+            models.Index(fields=['category', 'id'], condition=models.Q(is_active=True), name='part_active_category_id_idx'),
+            models.Index(fields=['price', 'id'], condition=models.Q(is_active=True), name='part_active_price_id_idx'),
+            models.Index(fields=['inventory', 'id'], condition=models.Q(is_active=True), name='part_active_inventory_id_idx'),
+            # پوششی برای GROUP BY شمارش فاست‌ها (بدون خواندن ردیف‌های پهن جدول)
+            models.Index(
+                fields=['category', 'part_type', 'turnover', 'has_warranty'],
+                condition=models.Q(is_active=True), name='part_active_facet_idx',
+            ),
+        ]
+
+    LOW_INVENTORY_THRESHOLD = 7
+    LOW_INVENTORY_WARNING = "برای اطلاع از موجودی تماس بگیرید : +980000000000"
+
     @property
     def inventory_warning(self):
-        if self.inventory < 7:
-            return "برای اطلاع از موجودی تماس بگیرید : +980000000000"
+        if self.inventory < self.LOW_INVENTORY_THRESHOLD:
+            return self.LOW_INVENTORY_WARNING
         return ""
     def __str__(self):
         return f"{self.name} - {self.commercial_code} - Category: {self.category_title}"
+
+
+class PartListing(models.Model):
+    """
+    Denormalized read model: one row per PartUnified with the category and car data
+    the list and detail endpoints render, so they read a single table.
+    Kept in sync by products.listing (imports, admin saves and signals).
+    """
+
+    id = models.BigIntegerField(primary_key=True, help_text="Same id as the PartUnified row")
+    name = models.CharField(max_length=255)
+    internal_code = models.CharField(max_length=50)
+    commercial_code = models.CharField(max_length=50, db_index=True)
+    price = models.PositiveIntegerField()
+    description = models.TextField(blank=True, null=True)
+    image_urls = models.JSONField(blank=True, null=True)
+    part_type = models.CharField(max_length=20, choices=PartUnified.PART_TYPE_CHOICES, default='spare')
+    turnover = models.CharField(max_length=1, choices=PartUnified.TURNOVER_CHOICES, blank=True, null=True)
+    inventory = models.IntegerField(default=0)
+    inventory_warning = models.CharField(max_length=255, blank=True, default='')
+    has_warranty = models.BooleanField(default=False)
+    warranty_name = models.CharField(max_length=255, blank=True, null=True)
+    is_active = models.BooleanField(default=True)
+    updated_time = models.DateTimeField(blank=True, null=True)
+
+    category_id = models.BigIntegerField(blank=True, null=True)
+    category_name = models.CharField(max_length=255, blank=True, null=True)
+    category_path = models.JSONField(default=list, blank=True, help_text="Category names from the root down")
+    category_title = models.CharField(max_length=255, blank=True, default='')
+
+    car_ids = models.JSONField(default=list, blank=True)
+    car_names = models.JSONField(default=list, blank=True, help_text="Ordered by car id")
+    brand_ids = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        # همان مسیرهای دسترسی PartUnified (فیلتر برابری و سپس ترتیب)
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(is_active=True), name='listing_active_id_idx'),
+            models.Index(fields=['part_type', 'id'], condition=models.Q(is_active=True), name='listing_active_type_id_idx'),
+            models.Index(fields=['category_id', 'id'], condition=models.Q(is_active=True), name='listing_active_cat_id_idx'),
+            models.Index(fields=['price', 'id'], condition=models.Q(is_active=True), name='listing_active_price_id_idx'),
+            models.Index(fields=['inventory', 'id'], condition=models.Q(is_active=True), name='listing_active_inv_id_idx'),
+            # بازه قیمت/موجودی داخل یک دسته با مرتب‌سازی روی همان ستون (بدون sort جداگانه)
+            models.Index(
+                fields=['category_id', 'price', 'id'], condition=models.Q(is_active=True), name='listing_active_cat_price_idx',
+            ),
+            models.Index(
+                fields=['category_id', 'inventory', 'id'], condition=models.Q(is_active=True), name='listing_active_cat_inv_idx',
+            ),
+            # export افزایشی (updated_since) به ترتیب زمان تغییر، شامل محصولات غیرفعال
+            models.Index(fields=['updated_time', 'id'], name='listing_updated_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - {self.commercial_code}"
+
+
+class ImportJob(models.Model):
+    KIND_CHOICES = (
+        ('catalog', 'Catalog (final_output)'),
+        ('tmkb2b', 'TMKB2B price/name sync (allData.json)'),
+    )
+
+    STATE_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='queued')
+    file_name = models.CharField(max_length=255, help_text="Original name of the uploaded file")
+    file_path = models.CharField(max_length=500, help_text="Uniquely named staged copy of the upload")
+    options = models.JSONField(default=dict, blank=True, help_text="Keyword arguments passed to the importer")
+
+    processed_rows = models.PositiveIntegerField(default=0)
+    rows_per_sec = models.FloatField(default=0)
+    stats = models.JSONField(default=dict, blank=True, help_text="Latest report returned by the importer")
+    errors = models.JSONField(default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    updated_time = models.DateTimeField(
+        auto_now=True,
+        help_text="Heartbeat: bumped on every progress update while the job runs"
+    )
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.file_name} - {self.state}"
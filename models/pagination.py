@@ -0,0 +1,151 @@
+import base64
+import binascii
+import json
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework import status
+from rest_framework.response import Response
+
+from .counts import part_count
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Django paginator whose count comes from the cached count service when the
+    view provides a filter signature (``None`` keeps the plain ``COUNT(*)``).
+    """
+
+    def __init__(self, object_list, per_page, signature=None, estimate=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.signature = signature
+        self.estimate = estimate
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        if self.signature is None:
+            return super().count
+        count, self.count_exact = part_count(self.object_list, self.signature, estimate=self.estimate)
+        return count
+
+
+class KeysetPagination:
+    """
+    Cursor (keyset) pagination that seeks on the ordering columns plus ``id``
+    instead of using OFFSET, so page 5,000 costs the same as page 1 and pages
+    stay stable while an import inserts rows.
+    """
+
+    # ordering -> ستون‌های seek (id برای یکتا بودن ترتیب همیشه آخر است)
+    orderings = {
+        'id': ('id',),
+        '-id': ('-id',),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+        'inventory': ('inventory', 'id'),
+        '-inventory': ('-inventory', '-id'),
+    }
+    default_ordering = 'id'
+    default_page_size = 10
+    max_page_size = 100
+
+    def __init__(self, ordering=None, page_size=None):
+        self.ordering = ordering or self.default_ordering
+        if self.ordering not in self.orderings:
+            raise InvalidCursor(f"Invalid ordering: {self.ordering}")
+        try:
+            page_size = int(page_size or self.default_page_size)
+        except (TypeError, ValueError):
+            raise InvalidCursor("Invalid page size")
+        self.page_size = max(1, min(page_size, self.max_page_size))
+        self.fields = self.orderings[self.ordering]
+
+    def encode_cursor(self, row, reverse):
+        # ردیف‌ها ممکن است نمونه مدل یا dict خروجی values() در serializer های سریع باشند
+        names = [field.lstrip('-') for field in self.fields]
+        position = [row[name] if isinstance(row, dict) else getattr(row, name) for name in names]
+        payload = json.dumps({"o": self.ordering, "p": position, "r": int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            position, reverse = payload["p"], bool(payload["r"])
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+            raise InvalidCursor("Invalid cursor")
+        if payload.get("o") != self.ordering or not isinstance(position, list) or len(position) != len(self.fields):
+            raise InvalidCursor("Cursor does not match the requested ordering")
+        return position, reverse
+
+    def seek_filter(self, position, reverse):
+        """
+        شرط lexicographic «بعد از position» روی ستون‌های ordering، مثلا برای (price, id):
+        price > p OR (price = p AND id > i)
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.fields, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def paginate(self, queryset, cursor=None):
+        """
+        خروجی: (ردیف‌های صفحه, cursor صفحه بعد, cursor صفحه قبل)
+        """
+        reverse = False
+        if cursor:
+            position, reverse = self.decode_cursor(cursor)
+            queryset = queryset.filter(self.seek_filter(position, reverse))
+
+        order_by = self.fields
+        if reverse:
+            order_by = [field[1:] if field.startswith('-') else f"-{field}" for field in self.fields]
+        rows = list(queryset.order_by(*order_by)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # حرکت به جلو یعنی صفحه قبلی وجود دارد و برعکس
+        has_next = True if reverse else has_more
+        has_previous = has_more if reverse else bool(cursor)
+        next_cursor = self.encode_cursor(rows[-1], False) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], True) if rows and has_previous else None
+        return rows, next_cursor, previous_cursor
+
+
+def wants_cursor_pagination(params):
+    """
+    حالت cursor با pagination=cursor یا ارسال یک cursor فعال می‌شود
+    """
+    return params.get("pagination") == "cursor" or bool(params.get("cursor"))
+
+
+def keyset_response(queryset, params, serializer_class, page_size=None):
+    """
+    پاسخ یک صفحه با cursor های مبهم next/previous (بدون count و OFFSET)
+    """
+    try:
+        paginator = KeysetPagination(params.get("ordering"), page_size or params.get("page_size"))
+        rows, next_cursor, previous_cursor = paginator.paginate(queryset, params.get("cursor"))
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "next": next_cursor,
+        "previous": previous_cursor,
+        "page_size": paginator.page_size,
+        "ordering": paginator.ordering,
+        "results": serializer_class(rows, many=True).data,
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,36 @@
+import re
+
+from django.db import connection
+
+# خط‌های plan که یعنی جدول بدون ایندکس کامل خوانده می‌شود
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"^SCAN (\w+)(?: AS \w+)?$"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+def explain_query_plan(sql, params=None, using=connection):
+    """
+    خروجی EXPLAIN (QUERY PLAN) یک کوئری به صورت لیست خط‌ها
+    """
+    prefix = "EXPLAIN QUERY PLAN " if using.vendor == "sqlite" else "EXPLAIN "
+    with using.cursor() as cursor:
+        cursor.execute(prefix + sql, params or ())
+        rows = cursor.fetchall()
+    # SQLite: (id, parent, notused, detail) / PostgreSQL: (line,)
+    return [row[-1] for row in rows]
+
+
+def full_scans(sql, params=None, tables=None, using=connection):
+    """
+    جدول‌هایی که plan کوئری آن‌ها را بدون ایندکس کامل اسکن می‌کند (اختیاری: فقط tables)
+    """
+    pattern = FULL_SCAN_PATTERNS.get(using.vendor)
+    if pattern is None:
+        return []
+    scanned = []
+    for line in explain_query_plan(sql, params, using):
+        match = pattern.search(line.strip())
+        if match and (tables is None or match.group(1) in tables):
+            scanned.append(match.group(1))
+    return scanned
@@ -0,0 +1,167 @@
+import re
+
+from django.conf import settings
+from django.db import connection, transaction, OperationalError
+from rest_framework import filters
+
+# جدول FTS5 جستجوی محصولات؛ rowid همان id محصول است
+SEARCH_TABLE = "products_partsearch"
+SEARCH_COLUMNS = ("name", "commercial_code", "internal_code", "category_title")
+
+# وزن bm25 هر ستون به ترتیب SEARCH_COLUMNS (نام و کدها مهم‌تر از عنوان دسته)
+SEARCH_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+_TRANSLATION = str.maketrans({
+    **{arabic: persian for arabic, persian in zip("يىكۀةأإٱؤ", "ییکههاااو")},
+    **{digit: str(n % 10) for n, digit in enumerate("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩")},
+    "\u200c": " ",  # نیم‌فاصله
+    "\u200d": None,
+    "\u0640": None,  # کشیده
+    "\u0670": None,
+    **{chr(code): None for code in range(0x064B, 0x0660)},  # اعراب
+})
+# «پژو207» و «پژو 207» یکسان شوند
+_LETTER_DIGIT = re.compile(r"(?<=[^\W\d_])(?=\d)|(?<=\d)(?=[^\W\d_])")
+_TOKEN = re.compile(r"[^\W_]+")
+
+_enabled = {}
+
+
+def normalize_persian(text):
+    """
+    یکسان‌سازی متن فارسی برای ایندکس و جستجو: ی/ک عربی، اعداد فارسی و عربی،
+    نیم‌فاصله، اعراب و مرز حرف و عدد
+    """
+    if not text:
+        return ""
+    return _LETTER_DIGIT.sub(" ", text.translate(_TRANSLATION).lower())
+
+
+def build_match_query(search):
+    """
+    تبدیل عبارت کاربر به کوئری MATCH: همه کلمات (به صورت پیشوندی) باید وجود داشته باشند
+    """
+    tokens = _TOKEN.findall(normalize_persian(search))
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def create_search_index():
+    """
+    ساخت جدول FTS5 اگر وجود نداشته باشد؛ خروجی True یعنی جدول همین الان ساخته شد
+    """
+    if connection.vendor != "sqlite" or not getattr(settings, "PART_SEARCH_FTS", True):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [SEARCH_TABLE])
+        if cursor.fetchone():
+            return False
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                f"{', '.join(SEARCH_COLUMNS)}, tokenize='unicode61', prefix='2 3')"
+            )
+        except OperationalError:
+            # SQLite بدون FTS5 کامپایل شده؛ جستجو به SearchFilter برمی‌گردد
+            return False
+    _enabled.pop(connection.settings_dict['NAME'], None)
+    return True
+
+
+def search_enabled():
+    name = connection.settings_dict['NAME']
+    if name not in _enabled:
+        enabled = connection.vendor == "sqlite" and getattr(settings, "PART_SEARCH_FTS", True)
+        if enabled:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [SEARCH_TABLE])
+                enabled = cursor.fetchone() is not None
+        _enabled[name] = enabled
+    return _enabled[name]
+
+
+def _index_row(part_id, *values):
+    return (part_id, *(normalize_persian(value) for value in values))
+
+
+def index_parts(parts):
+    """
+    درج یا جایگزینی ردیف ایندکس برای محصولات داده شده (باید pk و ستون‌های SEARCH_COLUMNS را داشته باشند)
+    """
+    if not parts or not search_enabled():
+        return
+    _write_rows([_index_row(part.pk, *(getattr(part, column) for column in SEARCH_COLUMNS)) for part in parts])
+
+
+def _write_rows(rows, replace=True):
+    with connection.cursor() as cursor:
+        if replace:
+            cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def remove_parts(part_ids):
+    if not part_ids or not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(part_id,) for part_id in part_ids])
+
+
+def rebuild_search_index(batch_size=2000):
+    """
+    ساخت دوباره کل ایندکس از جدول محصولات؛ خروجی تعداد ردیف‌های ایندکس شده
+    """
+    from .models import PartUnified
+
+    create_search_index()
+    if not search_enabled():
+        return 0
+    total = 0
+    rows = []
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for values in PartUnified.objects.values_list('id', *SEARCH_COLUMNS).iterator(chunk_size=batch_size):
+            rows.append(_index_row(*values))
+            if len(rows) >= batch_size:
+                _write_rows(rows, replace=False)
+                total += len(rows)
+                rows = []
+        if rows:
+            _write_rows(rows, replace=False)
+            total += len(rows)
+    return total
+
+
+def search_parts(queryset, search):
+    """
+    محدود کردن queryset به محصولات منطبق با search، مرتب شده بر اساس رتبه bm25
+    """
+    match = build_match_query(search)
+    if not match:
+        return queryset
+    part_table = queryset.model._meta.db_table
+    weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+    # FTS5 فقط با join روی rowid و MATCH روی نام جدول کار می‌کند؛ ORM راهی جز extra ندارد
+    return queryset.extra(
+        tables=[SEARCH_TABLE],
+        where=[f"{SEARCH_TABLE}.rowid = {part_table}.id", f"{SEARCH_TABLE} MATCH %s"],
+        params=[match],
+        select={"search_rank": f"bm25({SEARCH_TABLE}, {weights})"},
+        order_by=["search_rank", "id"],
+    )
+
+
+class PartSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter روی ایندکس FTS5 با متن نرمال‌شده فارسی (نتایج رتبه‌بندی‌شده و پیشوندی)؛
+    اگر ایندکس در دسترس نباشد همان جستجوی icontains پیش‌فرض DRF اجرا می‌شود
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, "")
+        if not search.strip() or not search_enabled():
+            return super().filter_queryset(request, queryset, view)
+        return search_parts(queryset, search)
@@ -1,8 +1,87 @@
+import json
+
+from django.db.models import Aggregate, OuterRef, Prefetch, Subquery, TextField
 from rest_framework import serializers
-from .models import CarBrandsModel, CarsModel, PartUnified, PartCategory
+from .models import CarBrandsModel, CarsModel, PartUnified, PartCategory, ImportJob
 
 class JSONUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
+    deactivate_missing = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Catalog imports only: mark parts that are not in the file as inactive"
+    )
+
+
+class CodeLookupSerializer(serializers.Serializer):
+    codes = serializers.ListField(
+        child=serializers.CharField(max_length=50, trim_whitespace=True),
+        min_length=1,
+        max_length=200,
+    )
+    mode = serializers.ChoiceField(choices=['exact', 'prefix'], default='exact')
+    field = serializers.ChoiceField(choices=['any', 'commercial', 'internal'], default='any')
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=100)
+
+    def validate(self, attrs):
+        if attrs['mode'] == 'prefix' and any(len(code) < 3 for code in attrs['codes']):
+            raise serializers.ValidationError({"codes": "Prefixes must be at least 3 characters."})
+        return attrs
+
+
+class BatchPartDetailSerializer(serializers.Serializer):
+    MAX_ITEMS = 300
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+    codes = serializers.ListField(
+        child=serializers.CharField(max_length=50, trim_whitespace=True), required=False, default=list
+    )
+
+    def validate(self, attrs):
+        total = len(attrs['ids']) + len(attrs['codes'])
+        if not total:
+            raise serializers.ValidationError("Send at least one id or code.")
+        if total > self.MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {self.MAX_ITEMS} ids and codes per request.")
+        return attrs
+
+
+class FacetFilterSerializer(serializers.Serializer):
+    part_type = serializers.ChoiceField(choices=PartUnified.PART_TYPE_CHOICES, required=False)
+    turnover = serializers.ChoiceField(choices=PartUnified.TURNOVER_CHOICES, required=False)
+    has_warranty = serializers.BooleanField(required=False, allow_null=True, default=None)
+    category_id = serializers.IntegerField(min_value=1, required=False)
+    car_id = serializers.IntegerField(min_value=1, required=False)
+    brand_id = serializers.IntegerField(min_value=1, required=False)
+
+
+class PartListFilterSerializer(serializers.Serializer):
+    price_min = serializers.IntegerField(min_value=0, required=False)
+    price_max = serializers.IntegerField(min_value=0, required=False)
+    in_stock = serializers.BooleanField(required=False, allow_null=True, default=None)
+    inventory_min = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get('price_min') is not None and attrs.get('price_max') is not None \
+                and attrs['price_min'] > attrs['price_max']:
+            raise serializers.ValidationError({"price_max": "Must be greater than or equal to price_min."})
+        return attrs
+
+
+class PartExportSerializer(serializers.Serializer):
+    # «format» را DRF برای انتخاب renderer رزرو کرده است
+    output = serializers.ChoiceField(choices=['ndjson', 'csv'], default='ndjson')
+    gzip = serializers.BooleanField(default=False)
+    updated_since = serializers.DateTimeField(required=False)
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'kind', 'state', 'file_name', 'options', 'processed_rows', 'rows_per_sec',
+            'stats', 'errors', 'created_at', 'started_at', 'finished_at', 'updated_time'
+        ]
 
 
 
@@ -33,6 +112,12 @@ class CarBrandWithCarsSerializer(serializers.ModelSerializer):
         model = CarBrandsModel
         fields = ['id', 'name', 'display_name', 'cars']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related(
+            Prefetch('cars', queryset=CarsModel.objects.only('id', 'code', 'name', 'brand_id'))
+        )
+
         
 # ------------------------------------------------------------------------
         
@@ -41,6 +126,11 @@ class PartSerializer(serializers.ModelSerializer):
         model = PartUnified
         fields = ['id', 'name', 'price', "image_urls"]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # inventory برای cursor مرتب‌شده بر اساس موجودی لازم است
+        return queryset.only('id', 'name', 'price', 'image_urls', 'inventory')
+
 class PartCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = PartCategory
@@ -60,12 +150,147 @@ class PartUnifiedSerializer(serializers.ModelSerializer):
             'inventory_warning', 'has_warranty', 'warranty_name' 
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        همه چیزی که serializer لازم دارد در دو کوئری (صفحه + ماشین‌ها)، مستقل از اندازه صفحه
+        """
+        return queryset.select_related('category').only(
+            'id', 'name', 'internal_code', 'commercial_code', 'price',
+            'description', 'image_urls', 'part_type', 'turnover', 'inventory',
+            'has_warranty', 'warranty_name', 'category__name',
+        ).prefetch_related(
+            # ترتیب ثابت (id ماشین) تا خروجی با FastPartUnifiedSerializer یکی باشد
+            Prefetch('cars', queryset=CarsModel.objects.only('id', 'name').order_by('id'))
+        )
+
     def get_car_names(self, obj):
         return [car.name for car in obj.cars.all()]
 
     def get_inventory_warning(self, obj):
         return obj.inventory_warning
 
+class CarPairs(Aggregate):
+    """
+    JSON array of [car id, car name] pairs: json_group_array on SQLite, json_agg on PostgreSQL.
+    """
+    function = 'JSON_GROUP_ARRAY'
+    template = '%(function)s(JSON_ARRAY(%(expressions)s))'
+    output_field = TextField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function='JSON_AGG', template='%(function)s(JSON_BUILD_ARRAY(%(expressions)s))',
+            **extra_context
+        )
+
+
+class FastPartUnifiedSerializer:
+    """
+    Read-only stand-in for ``PartUnifiedSerializer(many=True)`` on list pages.
+    Rows come from ``.values()`` with the cars aggregated by a correlated subquery,
+    and the output dicts are built directly; the rendered JSON is byte-identical.
+    """
+
+    value_fields = (
+        'id', 'name', 'internal_code', 'commercial_code', 'price', 'description', 'image_urls',
+        'part_type', 'turnover', 'inventory', 'has_warranty', 'warranty_name', 'category_id',
+    )
+
+    def __init__(self, rows, many=True, **kwargs):
+        self.rows = rows
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        through = PartUnified.cars.through
+        cars = through.objects.filter(partunified_id=OuterRef('pk')).values('partunified_id').annotate(
+            pairs=CarPairs('carsmodel_id', 'carsmodel__name')
+        ).values('pairs')
+        # نام دسته و ماشین‌ها به صورت subquery تا count() صفحه‌بندی بدون join بماند
+        return queryset.select_related(None).prefetch_related(None).values(
+            *cls.value_fields,
+            category_name=Subquery(PartCategory.objects.filter(pk=OuterRef('category_id')).order_by().values('name')),
+            car_pairs=Subquery(cars),
+        )
+
+    @staticmethod
+    def to_representation(row):
+        pairs = row['car_pairs'] or []
+        if isinstance(pairs, str):
+            pairs = json.loads(pairs)
+        inventory = row['inventory']
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'internal_code': row['internal_code'],
+            'commercial_code': row['commercial_code'],
+            'price': row['price'],
+            'description': row['description'],
+            'image_urls': row['image_urls'],
+            'part_type': row['part_type'],
+            'car_names': [name for _, name in sorted(pairs)],
+            'category': {'name': row['category_name']} if row['category_id'] is not None else None,
+            'turnover': row['turnover'],
+            'inventory': inventory,
+            'inventory_warning': (
+                PartUnified.LOW_INVENTORY_WARNING if inventory < PartUnified.LOW_INVENTORY_THRESHOLD else ""
+            ),
+            'has_warranty': row['has_warranty'],
+            'warranty_name': row['warranty_name'],
+        }
+
+    @property
+    def data(self):
+        return [self.to_representation(row) for row in self.rows]
+
+
+class PartListingSerializer:
+    """
+    Same output as ``PartUnifiedSerializer`` rendered from the PartListing read model:
+    one single-table ``.values()`` query, no joins or per-row formatting.
+    """
+
+    value_fields = (
+        'id', 'name', 'internal_code', 'commercial_code', 'price', 'description', 'image_urls', 'part_type',
+        'car_names', 'category_id', 'category_name', 'turnover', 'inventory', 'inventory_warning',
+        'has_warranty', 'warranty_name',
+    )
+
+    def __init__(self, rows, many=False, **kwargs):
+        self.rows = rows
+        self.many = many
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.values(*cls.value_fields)
+
+    @staticmethod
+    def to_representation(row):
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'internal_code': row['internal_code'],
+            'commercial_code': row['commercial_code'],
+            'price': row['price'],
+            'description': row['description'],
+            'image_urls': row['image_urls'],
+            'part_type': row['part_type'],
+            'car_names': row['car_names'],
+            'category': {'name': row['category_name']} if row['category_id'] is not None else None,
+            'turnover': row['turnover'],
+            'inventory': row['inventory'],
+            'inventory_warning': row['inventory_warning'],
+            'has_warranty': row['has_warranty'],
+            'warranty_name': row['warranty_name'],
+        }
+
+    @property
+    def data(self):
+        if not self.many:
+            return self.to_representation(self.rows)
+        return [self.to_representation(row) for row in self.rows]
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = PartCategory
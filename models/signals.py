@@ -0,0 +1,103 @@
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed, post_migrate
+from django.dispatch import receiver
+
+from .caching import BRANDS, CATEGORIES, PARTS
+from .counts import invalidate_part_counts
+from .listing import refresh_listings, rebuild_listings
+from .models import PartUnified, PartCategory, PartListing, CarsModel, CarBrandsModel
+from .search import create_search_index, rebuild_search_index, index_parts, remove_parts
+
+
+@receiver(post_save, sender=PartUnified)
+def part_saved(sender, instance, **kwargs):
+    invalidate_part_counts()
+    PARTS.delete(instance.pk)
+    index_parts([instance])
+    refresh_listings([instance.pk])
+
+
+@receiver(post_delete, sender=PartUnified)
+def part_deleted(sender, instance, **kwargs):
+    invalidate_part_counts()
+    PARTS.delete(instance.pk)
+    remove_parts([instance.pk])
+    PartListing.objects.filter(id=instance.pk).delete()
+
+
+@receiver(m2m_changed, sender=PartUnified.cars.through)
+def part_cars_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # بعد از clear دیگر معلوم نیست کدام محصولات این ماشین را داشتند
+        instance._cleared_part_ids = list(instance.parts.values_list('id', flat=True))
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_part_counts()
+        if not reverse:
+            part_ids = [instance.pk]
+        elif action == "post_clear":
+            part_ids = getattr(instance, "_cleared_part_ids", [])
+        else:
+            part_ids = list(pk_set)
+        # فقط جزئیات محصولاتی که ماشین‌هایشان عوض شد
+        PARTS.delete_many(part_ids)
+        refresh_listings(part_ids)
+
+
+@receiver(post_save, sender=PartCategory)
+@receiver(post_delete, sender=PartCategory)
+def category_changed(sender, **kwargs):
+    CATEGORIES.bump()
+    # نام دسته در جزئیات محصول هم هست
+    PARTS.bump()
+
+
+@receiver(post_save, sender=PartCategory)
+def category_saved(sender, instance, created, **kwargs):
+    # دسته تازه محصولی ندارد؛ تغییر نام یا جابه‌جایی مسیر همه محصولات زیردرخت را عوض می‌کند
+    # (محصولات دسته‌های حذف‌شده cascade و با post_delete خودشان پاک می‌شوند)
+    if not created:
+        refresh_listings(PartUnified.objects.filter(
+            category__in=instance.get_descendants(include_self=True)
+        ).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=CarsModel)
+@receiver(post_delete, sender=CarsModel)
+def car_changed(sender, **kwargs):
+    BRANDS.bump()
+    # نام ماشین‌ها در جزئیات محصول هم هست
+    PARTS.bump()
+
+
+@receiver(post_save, sender=CarsModel)
+def car_saved(sender, instance, created, **kwargs):
+    if not created:
+        refresh_listings(instance.parts.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=CarsModel)
+def car_deleting(sender, instance, **kwargs):
+    # ردیف‌های جدول واسط بدون سیگنال m2m_changed حذف می‌شوند
+    instance._deleted_part_ids = list(instance.parts.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=CarsModel)
+def car_deleted(sender, instance, **kwargs):
+    refresh_listings(getattr(instance, "_deleted_part_ids", []))
+
+
+@receiver(post_save, sender=CarBrandsModel)
+@receiver(post_delete, sender=CarBrandsModel)
+def brand_changed(sender, **kwargs):
+    BRANDS.bump()
+
+
+@receiver(post_migrate)
+def setup_search_index(sender, **kwargs):
+    # جدول FTS5 مدل Django ندارد؛ بعد از migrate ساخته و برای داده‌های موجود پر می‌شود
+    if sender.name != PartUnified._meta.app_config.name:
+        return
+    if create_search_index():
+        rebuild_search_index()
+    # read model تازه (یا خالی) برای محصولات موجود پر می‌شود
+    if not PartListing.objects.exists() and PartUnified.objects.exists():
+        rebuild_listings()
@@ -0,0 +1,126 @@
+import codecs
+import json
+import re
+
+# اندازه هر بار خواندن از فایل (کاراکتر یا بایت)
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_TAIL = re.compile(r'[0-9.eE+\-]*')
+
+
+class _JSONStream:
+    """
+    Buffered cursor over a text or binary file for incremental JSON decoding.
+    Only the unconsumed tail of the document is kept in memory.
+    """
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.bytes_decoder = None
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        if isinstance(chunk, bytes):
+            # decoder افزایشی کاراکترهای چندبایتی بریده‌شده بین دو chunk را نگه می‌دارد
+            if self.bytes_decoder is None:
+                self.bytes_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+            chunk = self.bytes_decoder.decode(chunk, final=self.eof)
+        elif not self.buf and chunk.startswith('\ufeff'):
+            chunk = chunk[1:]
+        if self.pos > self.chunk_size:
+            # حذف بخش مصرف‌شده بافر تا حافظه ثابت بماند
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next significant character ('' at EOF)."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.read_more():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.read_more():
+                    raise
+                continue
+            # یک عدد در انتهای بافر (مثلا "-1.") ممکن است در chunk بعدی ادامه داشته باشد
+            if not self.eof and NUMBER_TAIL.match(self.buf, end).end() == len(self.buf):
+                self.read_more()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(fp, key=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the items of a JSON array one at a time without loading the whole file.
+
+    With ``key=None`` the document must be a top-level list; otherwise it must be an
+    object and the items of the array stored under ``key`` are yielded (a missing key
+    or a ``null`` value yields nothing). ``fp`` may be opened in text or binary mode.
+    """
+    stream = _JSONStream(fp, chunk_size)
+
+    if key is not None:
+        stream.expect('{')
+        if stream.peek() == '}':
+            return
+        while True:
+            name = stream.value()
+            stream.expect(':')
+            if name == key:
+                if stream.peek() == 'n':
+                    stream.value()
+                    return
+                break
+            # مقدار کلیدهای دیگر کامل خوانده و رها می‌شود
+            stream.value()
+            if stream.peek() != ',':
+                stream.expect('}')
+                return
+            stream.pos += 1
+
+    stream.expect('[')
+    if stream.peek() == ']':
+        return
+    while True:
+        yield stream.value()
+        if stream.peek() == ',':
+            stream.pos += 1
+            continue
+        stream.expect(']')
+        return
+
+
+def open_json_items(file_path, key=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream the items of a JSON file on disk; see ``iter_json_items``.
+    """
+    with open(file_path, 'rb') as f:
+        yield from iter_json_items(f, key=key, chunk_size=chunk_size)
@@ -1,99 +1,244 @@
 import json
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from .models import PartCategory, PartUnified, CarsModel, CarBrandsModel
-from products.choices.car_data import CAR_MAP, BRAND_DISPLAY_NAMES, CATEGORY_KEYWORDS, CATEGORY_PATHS
+from .streaming import open_json_items
+from .classifier import find_category_path
+from .feed import part_fields, prepare_category, prepare_shard
+from .counts import refresh_part_counts
+from .search import index_parts
+from .listing import refresh_listings, deactivate_listings
+from .caching import CATEGORIES, PARTS, refresh_catalog_cache
+from .facets import facet_counts
+from products.choices.car_data import CAR_MAP, BRAND_DISPLAY_NAMES
 from core.logs import CustomLogger
 logger = CustomLogger()
 
-def find_category_path(title):
+# تعداد ردیف‌ها در هر batch برای حالت bulk
+DEFAULT_IMPORT_BATCH_SIZE = getattr(settings, "IMPORT_BATCH_SIZE", 1000)
+
+# تعداد process ها برای آماده‌سازی موازی ردیف‌ها در import افزایشی (۱ = سریال)
+DEFAULT_IMPORT_PROCESSES = getattr(settings, "IMPORT_PROCESSES", 1)
+
+# تعداد دسته‌ها (categories[]) در هر shard ارسالی به worker ها
+DEFAULT_IMPORT_SHARD_SIZE = getattr(settings, "IMPORT_SHARD_SIZE", 50)
+
+
+_END = object()
+
+
+class ImportStats:
     """
-    پیدا کردن مسیر دسته‌بندی از CATEGORY_KEYWORDS و CATEGORY_PATHS بر اساس title داده شده
+    Collects per-phase timings and row throughput for a single import run.
     """
-    for cat_key, keywords in CATEGORY_KEYWORDS.items():
-        for kw in keywords:
-            if kw in title:
-                return CATEGORY_PATHS.get(cat_key, ["لوازم یدکی"])  # مسیر پیش‌فرض
-    return ["لوازم یدکی"]  # مسیر پیش‌فرض اگر پیدا نشد
+
+    def __init__(self):
+        self.rows = 0
+        self.phases = {}
+        self.counts = {}
+        self.errors = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def timed(self, items, name):
+        """
+        Iterate ``items`` while charging the time spent producing each one to phase ``name``.
+        """
+        iterator = iter(items)
+        while True:
+            with self.phase(name):
+                item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self._started
+        return {
+            "rows": self.rows,
+            "elapsed": round(elapsed, 3),
+            "rows_per_sec": round(self.rows / elapsed, 1) if elapsed else 0.0,
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            **self.counts,
+            "errors": list(self.errors),
+        }
 
 
-def get_or_create_category_hierarchy(path_list):
+class CategoryPathCache:
     """
-    ایجاد سلسله‌مراتب دسته‌بندی بر اساس لیست مسیر
+    Import-scoped trie from category path tuples to PartCategory ids.
+
+    The existing forest is loaded with a single query; only missing nodes hit the
+    database. Use it inside ``deferred_category_tree`` so that new nodes skip the
+    per-insert MPTT lft/rght rewrites.
     """
-    parent = None
-    for name in path_list:
-        category, _ = PartCategory.objects.get_or_create(name=name, parent=parent)
-        parent = category
-    return parent  # دسته‌بندی آخر برگشت داده می‌شود
+
+    def __init__(self):
+        self.root = {}  # name -> [category_id, children]
+        self.created = 0
+        children_of = {}
+        for category_id, name, parent_id in PartCategory.objects.values_list('id', 'name', 'parent_id'):
+            children_of.setdefault(parent_id, []).append((category_id, name))
+
+        stack = [(None, self.root)]
+        while stack:
+            parent_id, children = stack.pop()
+            for category_id, name in children_of.get(parent_id, []):
+                node = children[name] = [category_id, {}]
+                stack.append((category_id, node[1]))
+
+    def resolve(self, path_list):
+        """
+        برگرداندن id دسته‌بندی آخر مسیر؛ گره‌های ناموجود ساخته می‌شوند
+        """
+        category_id = None
+        children = self.root
+        for name in path_list:
+            node = children.get(name)
+            if node is None:
+                category, created = PartCategory.objects.get_or_create(name=name, parent_id=category_id)
+                self.created += created
+                node = children[name] = [category.pk, {}]
+            category_id, children = node
+        return category_id
+
+
+@contextmanager
+def deferred_category_tree(stats=None):
+    """
+    غیرفعال کردن به‌روزرسانی‌های MPTT در طول import و یک بار rebuild درخت در پایان
+    """
+    cache = CategoryPathCache()
+    try:
+        with PartCategory.objects.disable_mptt_updates():
+            yield cache
+    finally:
+        if cache.created:
+            if stats is None:
+                PartCategory.objects.rebuild()
+            else:
+                with stats.phase("rebuild_tree"):
+                    PartCategory.objects.rebuild()
+            # rebuild فقط UPDATE است و سیگنالی نمی‌فرستد
+            CATEGORIES.bump()
+
+
+def get_or_create_car(car_name_fa, brands=None):
+    """
+    ساخت یا بازیابی ماشین (و برند آن) بر اساس نام فارسی موجود در فایل
+    """
+    if not car_name_fa:
+        return None
+
+    car_info = CAR_MAP.get(car_name_fa)
+    if car_info:
+        # حالا ۳ مقدار داریم: کد انگلیسی ماشین، نام فارسی ماشین، کد برند
+        car_code_en, car_name_fa, brand_code_en = car_info
+
+        # ساخت یا بازیابی برند ماشین با نام فارسی
+        brand = brands.get(brand_code_en) if brands is not None else None
+        if brand is None:
+            brand, _ = CarBrandsModel.objects.get_or_create(
+                name=brand_code_en,
+                defaults={'display_name': BRAND_DISPLAY_NAMES.get(brand_code_en, brand_code_en)}
+            )
+            if brands is not None:
+                brands[brand_code_en] = brand
+
+        # ساخت یا بازیابی ماشین با برند مرتبط
+        car, _ = CarsModel.objects.get_or_create(
+            code=car_code_en,
+            defaults={
+                'name': car_name_fa,
+                'brand': brand,
+                'slug': car_code_en,
+            }
+        )
+        return car
+
+    # اگر در مپ نبود، فقط به صورت نام وارد شود (بدون برند)
+    car_code_slug = car_name_fa.replace(" ", "-")
+    car, _ = CarsModel.objects.get_or_create(
+        code=car_code_slug,
+        defaults={
+            'name': car_name_fa,
+            'slug': car_code_slug,
+            'brand': None,
+        }
+    )
+    return car
+
+
+class CarResolver:
+    """
+    Import-scoped map from the Persian car names in a feed to CarsModel ids.
+    Existing brands and cars are loaded once; unknown names are created on first use.
+    """
+
+    def __init__(self):
+        self.brands = {brand.name: brand for brand in CarBrandsModel.objects.all()}
+        self.cars = dict(CarsModel.objects.values_list('code', 'id'))
+        self.by_name = {}
+
+    def resolve(self, car_names):
+        car_ids = set()
+        for car_name_fa in car_names:
+            car_id = self.by_name.get(car_name_fa)
+            if car_id is None and car_name_fa:
+                car_info = CAR_MAP.get(car_name_fa)
+                code = car_info[0] if car_info else car_name_fa.replace(" ", "-")
+                car_id = self.cars.get(code)
+                if car_id is None:
+                    car_id = get_or_create_car(car_name_fa, brands=self.brands).id
+                    self.cars[code] = car_id
+                self.by_name[car_name_fa] = car_id
+            if car_id is not None:
+                car_ids.add(car_id)
+        return car_ids
+
+
+def build_part(product, category_id, category_data):
+    """
+    ساخت نمونه PartUnified (بدون ذخیره) از یک محصول فایل
+    """
+    return PartUnified(category_id=category_id, **part_fields(product, category_data))
+
 
 @transaction.atomic
 def process_uploaded_json(file_path):
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        for category_data in data.get('categories', []):
-            # پیدا کردن مسیر دسته‌بندی و ایجاد سلسله‌مراتب
-            cat_path = find_category_path(category_data.get('title', ''))
-            category = get_or_create_category_hierarchy(cat_path)
-
-            for product in category_data.get('products', []):
-                car_objects = []
-
-                for car_name_fa in product.get('cars', []):
-                    car_info = CAR_MAP.get(car_name_fa)
-                    if car_info:
-                        # حالا ۳ مقدار داریم: کد انگلیسی ماشین، نام فارسی ماشین، کد برند
-                        car_code_en, car_name_fa, brand_code_en = car_info
-
-                        # ساخت یا بازیابی برند ماشین با نام فارسی
-                        brand, _ = CarBrandsModel.objects.get_or_create(
-                            name=brand_code_en,
-                            defaults={'display_name': BRAND_DISPLAY_NAMES.get(brand_code_en, brand_code_en)}
-                        )
-
-                        # ساخت یا بازیابی ماشین با برند مرتبط
-                        car, _ = CarsModel.objects.get_or_create(
-                            code=car_code_en,
-                            defaults={
-                                'name': car_name_fa,
-                                'brand': brand,
-                                'slug': car_code_en,
-                            }
-                        )
-                        car_objects.append(car)
-                    else:
-                        # اگر در مپ نبود، فقط به صورت نام وارد شود (بدون برند)
-                        car_code_slug = car_name_fa.replace(" ", "-")
-                        car, _ = CarsModel.objects.get_or_create(
-                            code=car_code_slug,
-                            defaults={
-                                'name': car_name_fa,
-                                'slug': car_code_slug,
-                                'brand': None,
-                            }
-                        )
-                        car_objects.append(car)
-
-                # تشخیص گارانتی
-                has_warranty = "گارانتی" in product['name']
-                warranty_name = "گارانتی پلاس" if "گارانتی پلاس" in product['name'] else None
-
-                # ایجاد محصول
-                part = PartUnified.objects.create(
-                    name=product['name'],
-                    internal_code=product['ekhtesasiCode'],
-                    commercial_code=product['tegaratCode'],
-                    price=int(product['price']),
-                    category=category,
-                    category_title=category_data['title'],
-                    category_url=category_data.get('url', ''),
-                    category_description=category_data.get('description', ''),
-                    image_urls=category_data.get('images', []),
-                    has_warranty=has_warranty,
-                    warranty_name=warranty_name
-                )
-                part.cars.set(car_objects)
+        with deferred_category_tree() as category_cache:
+            for category_data in open_json_items(file_path, key='categories'):
+                # پیدا کردن مسیر دسته‌بندی و ایجاد سلسله‌مراتب
+                cat_path = find_category_path(category_data.get('title', ''))
+                category_id = category_cache.resolve(cat_path)
+
+                for product in category_data.get('products') or []:
+                    car_objects = []
+
+                    for car_name_fa in product.get('cars', []):
+                        car = get_or_create_car(car_name_fa)
+                        if car is not None:
+                            car_objects.append(car)
+
+                    # ایجاد محصول
+                    part = build_part(product, category_id, category_data)
+                    part.save()
+                    part.cars.set(car_objects)
 
     except Exception as e:
         logger.log(
@@ -103,41 +248,380 @@ def process_uploaded_json(file_path):
                 error=str(e)
             )
 
-def manage_tmkb2b(json_path):
-    import json
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data_list = json.load(f)
-    
-    for item in data_list:
-        commercial_code = item.get('tegaratCode') or item.get('commercial_code') 
-        if not commercial_code:
-            continue
-        
-        try:
-            obj = PartUnified.objects.get(commercial_code=commercial_code)
-            obj.name = item.get('name', obj.name)
-            obj.price = item.get('price', obj.price)
-            obj.save()
-        except PartUnified.DoesNotExist:
-            try:
-                obj = PartUnified.objects.create(
-                    name = item.get('name', ''),
-                    commercial_code = commercial_code,
-                    price = item.get('price', 0),
-                    internal_code = item.get('ekhtesasiCode', ''), 
-                )
-                obj.save()
-            except Exception as e:
-                logger.log(
-                    module_name="products.tasks",
-                    class_name="manage_tmkb2b",
-                    message="Error when creating product into db",
-                    error=str(e)
+
+def _insert_cars(pairs, batch_size):
+    """
+    ردیف‌های جدول واسط ماشین‌ها برای (محصول ذخیره‌شده, id ماشین‌ها)
+    """
+    through = PartUnified.cars.through
+    through.objects.bulk_create(
+        [through(partunified_id=part.pk, carsmodel_id=car_id) for part, car_ids in pairs for car_id in car_ids],
+        batch_size=batch_size,
+    )
+
+
+def _refresh_derived(parts, stats, batch_size):
+    """
+    ایندکس جستجو و read model محصولات نوشته‌شده (bulk_create/update سیگنال ندارند)
+    """
+    with stats.phase("search_index"):
+        index_parts(parts)
+    with stats.phase("listing"):
+        refresh_listings([part.pk for part in parts], batch_size=batch_size)
+
+
+def _finish_import(stats, class_name, message):
+    """
+    پایان هر import: count ها، cache کاتالوگ و فاست‌های بدون فیلتر یک بار باطل و دوباره ساخته می‌شوند
+    """
+    refresh_part_counts()
+    refresh_catalog_cache()
+    facet_counts()
+    report = stats.as_dict()
+    logger.log(
+        module_name="products.tasks",
+        class_name=class_name,
+        message=f"{message}: {json.dumps(report)}",
+    )
+    return report
+
+
+def _flush_parts(pending, stats, batch_size):
+    """
+    درج یک batch از محصولات و ردیف‌های جدول واسط ماشین‌ها در یک تراکنش
+    """
+    if not pending:
+        return
+    with transaction.atomic():
+        with stats.phase("insert_parts"):
+            parts = PartUnified.objects.bulk_create(
+                [part for part, _ in pending], batch_size=batch_size
+            )
+        with stats.phase("insert_cars"):
+            _insert_cars([(part, car_ids) for part, (_, car_ids) in zip(parts, pending)], batch_size)
+        _refresh_derived(parts, stats, batch_size)
+    stats.counts["created"] += len(parts)
+    stats.rows += len(parts)
+
+
+def process_uploaded_json_bulk(file_path, batch_size=DEFAULT_IMPORT_BATCH_SIZE, progress=None):
+    """
+    درج همه محصولات فایل بدون مقایسه با ردیف‌های موجود؛ فقط مبنای مقایسه در benchmark_import است
+    (upload ها از process_uploaded_json_delta استفاده می‌کنند). آماده‌سازی ردیف‌ها، resolve ماشین‌ها و
+    دسته‌ها و نوشتن جدول‌های وابسته همان helper های import افزایشی است.
+    progress (اختیاری) بعد از هر batch با گزارش لحظه‌ای صدا زده می‌شود.
+    خروجی: گزارش زمان هر مرحله و تعداد ردیف در ثانیه
+    """
+    stats = ImportStats()
+    stats.counts["created"] = 0
+    try:
+        with stats.phase("resolve"):
+            car_resolver = CarResolver()
+        pending = []
+        categories = open_json_items(file_path, key='categories')
+
+        with deferred_category_tree(stats) as category_cache:
+            # فایل به صورت جریانی خوانده می‌شود؛ در هر لحظه فقط یک دسته و یک batch در حافظه است
+            for cat_path, rows in stats.timed(prepared_categories(categories), "prepare"):
+                with stats.phase("resolve"):
+                    category_id = category_cache.resolve(cat_path)
+
+                for fields, car_names in rows:
+                    with stats.phase("resolve"):
+                        car_ids = car_resolver.resolve(car_names)
+                    pending.append((PartUnified(category_id=category_id, **fields), car_ids))
+
+                    if len(pending) >= batch_size:
+                        _flush_parts(pending, stats, batch_size)
+                        pending = []
+                        if progress is not None:
+                            progress(stats.as_dict())
+
+            _flush_parts(pending, stats, batch_size)
+
+    except Exception as e:
+        stats.errors.append(str(e))
+        logger.log(
+                module_name="products.tasks",
+                class_name="process_uploaded_json_bulk",
+                message="Error when bulk importing data into db",
+                error=str(e)
+            )
+
+    return _finish_import(stats, "process_uploaded_json_bulk", "Bulk import finished")
+
+
+# فیلدهایی که import افزایشی روی محصولات موجود بازنویسی می‌کند
+DELTA_UPDATE_FIELDS = [
+    'name', 'price', 'category_id', 'category_title', 'category_url', 'category_description',
+    'image_urls', 'has_warranty', 'warranty_name', 'content_hash', 'is_active',
+]
+
+
+def _flush_delta(pending, stats, batch_size, seen_ids):
+    """
+    مقایسه هش یک batch با ردیف‌های موجود (کلید: کد تجاری + کد اختصاصی)؛
+    محصولات جدید درج، تغییر کرده‌ها به‌روز و بدون تغییرها رد می‌شوند
+    """
+    if not pending:
+        return
+    existing = {}
+    with stats.phase("diff"):
+        rows = PartUnified.objects.filter(
+            commercial_code__in={commercial_code for commercial_code, _ in pending}
+        ).order_by('id').values_list('id', 'commercial_code', 'internal_code', 'content_hash', 'is_active')
+        for part_id, commercial_code, internal_code, content_hash, is_active in rows:
+            # اگر قبلا محصول تکراری ساخته شده باشد، قدیمی‌ترین ردیف مرجع است
+            existing.setdefault((commercial_code, internal_code), (part_id, content_hash, is_active))
+
+        to_create = []
+        to_update = []
+        for key, (part, car_ids) in pending.items():
+            row = existing.get(key)
+            if row is None:
+                to_create.append((part, car_ids))
+                continue
+            part_id, content_hash, is_active = row
+            if seen_ids is not None:
+                seen_ids.add(part_id)
+            if content_hash == part.content_hash and is_active:
+                stats.counts["unchanged"] += 1
+                continue
+            part.pk = part_id
+            to_update.append((part, car_ids))
+
+    # update() و bulk_update فیلد auto_now را پر نمی‌کنند
+    now = timezone.now()
+    with transaction.atomic():
+        with stats.phase("insert_parts"):
+            created = PartUnified.objects.bulk_create(
+                [part for part, _ in to_create], batch_size=batch_size
+            )
+        with stats.phase("update_parts"):
+            # با ۱۱ فیلد، ساخت CASE WHEN های bulk_update چند برابر کندتر از یک UPDATE
+            # ساده برای هر ردیف (داخل همین تراکنش) است
+            for part, _ in to_update:
+                PartUnified.objects.filter(pk=part.pk).update(
+                    updated_time=now, **{field: getattr(part, field) for field in DELTA_UPDATE_FIELDS}
                 )
-        except Exception as e:
-            logger.log(
+        with stats.phase("insert_cars"):
+            PartUnified.cars.through.objects.filter(partunified_id__in=[part.pk for part, _ in to_update]).delete()
+            _insert_cars(to_create + to_update, batch_size)
+        _refresh_derived(created + [part for part, _ in to_update], stats, batch_size)
+
+    if seen_ids is not None:
+        seen_ids.update(part.pk for part in created)
+    stats.counts["created"] += len(created)
+    stats.counts["updated"] += len(to_update)
+    stats.rows += len(pending)
+
+
+def _deactivate_missing(seen_ids, stats, batch_size):
+    """
+    غیرفعال کردن محصولات فعالی که در فایل کامل این import نبودند
+    """
+    with stats.phase("deactivate"):
+        now = timezone.now()
+        missing = []
+        active_ids = PartUnified.objects.filter(is_active=True).values_list('id', flat=True)
+        for part_id in active_ids.iterator(chunk_size=batch_size):
+            if part_id not in seen_ids:
+                missing.append(part_id)
+        for start in range(0, len(missing), batch_size):
+            PartUnified.objects.filter(id__in=missing[start:start + batch_size]).update(
+                is_active=False, updated_time=now
+            )
+            deactivate_listings(missing[start:start + batch_size], now)
+            # جزئیات cache شده محصول غیرفعال دیگر نباید 200 برگرداند
+            PARTS.delete_many(missing[start:start + batch_size])
+    stats.counts["deactivated"] += len(missing)
+
+
+def _shards(items, shard_size):
+    shard = []
+    for item in items:
+        shard.append(item)
+        if len(shard) >= shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+def prepared_categories(categories, processes=1, shard_size=DEFAULT_IMPORT_SHARD_SIZE):
+    """
+    خروجی prepare_category برای هر دسته به ترتیب فایل؛ با processes > 1 دسته‌ها به صورت
+    shard به یک ProcessPoolExecutor داده می‌شوند (حداکثر دو shard در صف هر worker)
+    """
+    if processes <= 1:
+        for category_data in categories:
+            yield prepare_category(category_data)
+        return
+
+    # spawn: import ها در thread اجرا می‌شوند و fork کردن process چند-thread امن نیست
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as executor:
+        in_flight = deque()
+        for shard in _shards(categories, shard_size):
+            in_flight.append(executor.submit(prepare_shard, shard))
+            if len(in_flight) >= processes * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def process_uploaded_json_delta(file_path, batch_size=DEFAULT_IMPORT_BATCH_SIZE,
+                                deactivate_missing=False, progress=None,
+                                processes=DEFAULT_IMPORT_PROCESSES, shard_size=DEFAULT_IMPORT_SHARD_SIZE):
+    """
+    import افزایشی فایل final_output: محصولات با کد تجاری + کد اختصاصی شناسایی می‌شوند و
+    فقط محصولات جدید یا دارای هش متفاوت نوشته می‌شوند؛ اجرای دوباره همان فایل چیزی نمی‌نویسد.
+    با deactivate_missing محصولاتی که در فایل نیستند is_active=False می‌شوند.
+    با processes > 1 دسته‌بندی کلمات، هش و ساخت فیلدها در چند process انجام می‌شود و
+    فقط همین process (تنها نویسنده) در دیتابیس می‌نویسد؛ نتیجه با حالت سریال یکسان است.
+    """
+    stats = ImportStats()
+    stats.counts.update({"created": 0, "updated": 0, "unchanged": 0, "deactivated": 0})
+    seen_ids = set() if deactivate_missing else None
+    try:
+        with stats.phase("resolve"):
+            car_resolver = CarResolver()
+        pending = {}
+        categories = open_json_items(file_path, key='categories')
+
+        with deferred_category_tree(stats) as category_cache:
+            for cat_path, rows in stats.timed(prepared_categories(categories, processes, shard_size), "prepare"):
+                with stats.phase("resolve"):
+                    category_id = category_cache.resolve(cat_path)
+
+                for fields, car_names in rows:
+                    with stats.phase("resolve"):
+                        car_ids = car_resolver.resolve(car_names)
+
+                    part = PartUnified(category_id=category_id, **fields)
+                    # محصول تکراری در فایل فقط یک بار حساب می‌شود
+                    pending[(part.commercial_code, part.internal_code)] = (part, car_ids)
+
+                    if len(pending) >= batch_size:
+                        _flush_delta(pending, stats, batch_size, seen_ids)
+                        pending = {}
+                        if progress is not None:
+                            progress(stats.as_dict())
+
+            _flush_delta(pending, stats, batch_size, seen_ids)
+
+        if deactivate_missing:
+            _deactivate_missing(seen_ids, stats, batch_size)
+
+    except Exception as e:
+        stats.errors.append(str(e))
+        logger.log(
                 module_name="products.tasks",
-                class_name="manage_tmkb2b",
-                message="Error when manage data into db",
+                class_name="process_uploaded_json_delta",
+                message="Error when delta importing data into db",
                 error=str(e)
             )
+
+    return _finish_import(stats, "process_uploaded_json_delta", "Delta import finished")
+
+
+def _upsert_tmkb2b_chunk(items, summary, batch_size):
+    """
+    یک chunk از آیتم‌های فایل را با یک کوئری IN پیدا می‌کند و فقط ردیف‌های تغییر کرده را
+    با bulk_update و کدهای جدید را با bulk_create ذخیره می‌کند
+    """
+    existing = {}
+    for part in PartUnified.objects.filter(
+        commercial_code__in=list(items)
+    ).only('id', 'commercial_code', 'internal_code', 'name', 'price', 'category_title'):
+        existing.setdefault(part.commercial_code, []).append(part)
+
+    to_create = []
+    to_update = []
+    # bulk_update فیلد auto_now را پر نمی‌کند
+    now = timezone.now()
+    for commercial_code, item in items.items():
+        parts = existing.get(commercial_code)
+        if not parts:
+            to_create.append(PartUnified(
+                name=item.get('name', ''),
+                commercial_code=commercial_code,
+                price=item.get('price', 0),
+                internal_code=item.get('ekhtesasiCode', ''),
+            ))
+            continue
+
+        # ممکن است چند محصول کد تجاری یکسان داشته باشند؛ همه هم‌گام می‌شوند
+        for part in parts:
+            name = item.get('name', part.name)
+            price = item.get('price', part.price)
+            if name == part.name and price == part.price:
+                summary["unchanged"] += 1
+                continue
+            part.name = name
+            part.price = price
+            part.updated_time = now
+            to_update.append(part)
+
+    with transaction.atomic():
+        if to_create:
+            PartUnified.objects.bulk_create(to_create, batch_size=batch_size)
+        if to_update:
+            PartUnified.objects.bulk_update(to_update, fields=['name', 'price', 'updated_time'], batch_size=batch_size)
+        index_parts(to_create + to_update)
+        refresh_listings([part.pk for part in to_create + to_update], batch_size=batch_size)
+    summary["created"] += len(to_create)
+    summary["updated"] += len(to_update)
+
+
+def manage_tmkb2b(json_path, batch_size=DEFAULT_IMPORT_BATCH_SIZE, progress=None):
+    """
+    هم‌گام‌سازی نام و قیمت محصولات از فایل allData.json به صورت batch
+    progress (اختیاری) بعد از هر chunk با خلاصه لحظه‌ای صدا زده می‌شود.
+    خروجی: تعداد محصولات ساخته‌شده، به‌روزشده، بدون تغییر و رد شده
+    """
+    summary = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0, "errors": []}
+    chunk = {}
+    try:
+        for item in open_json_items(json_path):
+            commercial_code = item.get('tegaratCode') or item.get('commercial_code')
+            if not commercial_code:
+                summary["skipped"] += 1
+                continue
+            try:
+                if 'price' in item:
+                    item['price'] = int(item['price'])
+            except (TypeError, ValueError):
+                summary["skipped"] += 1
+                continue
+
+            commercial_code = str(commercial_code)
+            if commercial_code in chunk:
+                # کد تکراری در همین chunk: مقدار آخر فایل معتبر است
+                summary["skipped"] += 1
+            chunk[commercial_code] = item
+            if len(chunk) >= batch_size:
+                _upsert_tmkb2b_chunk(chunk, summary, batch_size)
+                chunk = {}
+                if progress is not None:
+                    progress(dict(summary))
+
+        if chunk:
+            _upsert_tmkb2b_chunk(chunk, summary, batch_size)
+    except Exception as e:
+        summary["errors"].append(str(e))
+        logger.log(
+            module_name="products.tasks",
+            class_name="manage_tmkb2b",
+            message="Error when manage data into db",
+            error=str(e)
+        )
+
+    refresh_part_counts()
+    refresh_catalog_cache()
+    facet_counts()
+    logger.log(
+        module_name="products.tasks",
+        class_name="manage_tmkb2b",
+        message=f"TMKB2B sync finished: {json.dumps(summary)}",
+    )
+    return summary
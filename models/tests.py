@@ -1,3 +1,1059 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import warnings
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from products.choices.car_data import CATEGORY_KEYWORDS
+from .caching import BRANDS
+from .classifier import KeywordAutomaton, find_category_path, find_category_path_scan
+from .counts import count_signature, part_count, category_product_counts
+from .jobs import ABANDONED_JOB_ERROR, IMPORTERS, _execute, _progress_updater, reclaim_stale_jobs
+from .listing import rebuild_listings
+from .models import PartUnified, PartCategory, PartListing, CarsModel, CarBrandsModel, ImportJob
+from .pagination import KeysetPagination
+from .queryplan import explain_query_plan, full_scans
+from .search import normalize_persian, rebuild_search_index, search_enabled
+from .serializers import FastPartUnifiedSerializer, PartListingSerializer, PartUnifiedSerializer
+from .streaming import iter_json_items
+from .tasks import manage_tmkb2b, process_uploaded_json_bulk, process_uploaded_json_delta
+
+SAMPLE_FEED = os.path.join(settings.BASE_DIR, 'models', 'jsonfile', 'final_output_new.json')
+
+
+def write_sample_feed(categories=60):
+    """
+    Write the first ``categories`` entries of the sample feed to a temp file and return its path.
+    """
+    with open(SAMPLE_FEED, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    handle, path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(handle, 'w', encoding='utf-8') as f:
+        json.dump({'categories': data['categories'][:categories]}, f, ensure_ascii=False)
+    return path
+
+
+class CategoryClassifierTests(SimpleTestCase):
+    def test_matches_linear_scan_for_every_sample_title(self):
+        with open(SAMPLE_FEED, 'r', encoding='utf-8') as f:
+            titles = [category['title'] for category in json.load(f)['categories']]
+
+        self.assertTrue(titles)
+        for title in titles:
+            self.assertEqual(find_category_path(title), find_category_path_scan(title), title)
+
+    def test_matches_linear_scan_for_keyword_combinations(self):
+        keywords = [kw for kws in CATEGORY_KEYWORDS.values() for kw in kws]
+        for first in keywords:
+            for second in keywords[::7]:
+                title = f"قطعه {second} و {first}"
+                self.assertEqual(find_category_path(title), find_category_path_scan(title), title)
+
+    def test_lowest_priority_wins_over_earlier_or_longer_hits(self):
+        automaton = KeywordAutomaton([("ab", 1, "ab"), ("bcd", 0, "bcd"), ("abcde", 2, "abcde")])
+        self.assertEqual(automaton.best_match("xabcdex"), "bcd")
+        self.assertEqual(automaton.best_match("xabx"), "ab")
+        self.assertIsNone(automaton.best_match("xyz"))
+
+
+class StreamingJSONTests(SimpleTestCase):
+    """
+    iter_json_items gives json.loads results whatever the chunk boundaries (1 and 7 split every token).
+    """
+
+    items = [
+        {"name": "لنت ترمز \"جلو\" \\ پژو", "code": "\u0627\u06cc", "price": -1250.5e2, "tags": []},
+        {"nested": {"a": [1, 23456789, True, False, None]}, "empty": {}},
+        "رشته", 0, 1e-7, [],
+    ]
+
+    def read(self, document, key=None):
+        results = []
+        for chunk_size in (1, 7, 64 * 1024):
+            results.append(list(iter_json_items(io.StringIO(document), key=key, chunk_size=chunk_size)))
+            results.append(list(iter_json_items(io.BytesIO(document.encode('utf-8')), key=key, chunk_size=chunk_size)))
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
+        return results[0]
+
+    def test_top_level_array(self):
+        document = json.dumps(self.items, ensure_ascii=False, indent=2)
+        self.assertEqual(self.read(document), self.items)
+        self.assertEqual(self.read("\ufeff" + document + " \n\t\r\n"), self.items)
+        self.assertEqual(self.read(" [ ] \n"), [])
+
+    def test_items_under_key(self):
+        document = json.dumps(
+            {"meta": {"categories": [1, 2], "count": 3}, "other": "categories", "categories": self.items, "tail": 1},
+            ensure_ascii=False,
+        )
+        self.assertEqual(self.read(document, key='categories'), self.items)
+        self.assertEqual(self.read('{"categories": []}', key='categories'), [])
+        self.assertEqual(self.read('{"categories": null}', key='categories'), [])
+        self.assertEqual(self.read('{"other": [1]} ', key='categories'), [])
+        self.assertEqual(self.read('{}', key='categories'), [])
+
+    def test_truncated_or_invalid_documents_raise(self):
+        for document, key in [
+            ('[{"a": 1}, {"b"', None), ('[1, 2', None), ('["abc', None), ('[1 2]', None),
+            ('{"categories": [1,', 'categories'), ('{"categories" [1]}', 'categories'), ('[1]', 'categories'),
+        ]:
+            for chunk_size in (1, 7):
+                with self.assertRaises(json.JSONDecodeError, msg=document):
+                    list(iter_json_items(io.StringIO(document), key=key, chunk_size=chunk_size))
+
+
+class DeltaImportTests(TestCase):
+    def setUp(self):
+        self.feed = write_sample_feed()
+        self.addCleanup(os.remove, self.feed)
+
+    def snapshot(self):
+        return [
+            (part.name, part.commercial_code, part.internal_code, part.price, part.category.name,
+             part.content_hash, sorted(car.code for car in part.cars.all()), part.image_urls, part.is_active)
+            for part in PartUnified.objects.select_related('category').prefetch_related('cars').order_by('id')
+        ]
+
+    def test_reimport_writes_nothing(self):
+        first = process_uploaded_json_delta(self.feed, batch_size=100)
+        self.assertEqual(first['errors'], [])
+        self.assertGreater(first['created'], 0)
+        before = self.snapshot()
+        # export افزایشی (updated_since) نباید محصولات بدون تغییر را دوباره بفرستد
+        updated = dict(PartListing.objects.values_list('id', 'updated_time'))
+        self.assertNotIn(None, updated.values())
+
+        second = process_uploaded_json_delta(self.feed, batch_size=100)
+        self.assertEqual((second['created'], second['updated']), (0, 0))
+        self.assertEqual(second['unchanged'], first['created'] + first['unchanged'])
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(dict(PartListing.objects.values_list('id', 'updated_time')), updated)
+
+    def test_bulk_baseline_matches_delta(self):
+        report = process_uploaded_json_bulk(self.feed, batch_size=100)
+        self.assertEqual(report['errors'], [])
+        self.assertEqual((report['created'], report['rows']), (PartUnified.objects.count(), PartUnified.objects.count()))
+        self.assertEqual(PartListing.objects.count(), report['created'])
+        bulk = {json.dumps(row, ensure_ascii=False) for row in self.snapshot()}
+
+        # همان فیلدها و هش import افزایشی؛ فقط ردیف‌های تکراری فایل بیش از یک بار درج شده‌اند
+        PartUnified.objects.all().delete()
+        process_uploaded_json_delta(self.feed, batch_size=100)
+        delta = {json.dumps(row, ensure_ascii=False) for row in self.snapshot()}
+        self.assertLessEqual(delta, bulk)
+        codes = lambda rows: {tuple(row[1:3]) for row in map(json.loads, rows)}
+        self.assertEqual(codes(bulk), codes(delta))
+
+    def test_deactivated_parts_have_no_detail(self):
+        process_uploaded_json_delta(self.feed, batch_size=100)
+        part_ids = list(PartUnified.objects.values_list('id', flat=True))
+        for part_id in part_ids:
+            self.client.get(reverse('part-detail', args=[part_id]))
+        partial = write_sample_feed(categories=20)
+        self.addCleanup(os.remove, partial)
+        report = process_uploaded_json_delta(partial, batch_size=100, deactivate_missing=True)
+        self.assertGreater(report['deactivated'], 0)
+
+        inactive = PartUnified.objects.filter(is_active=False).values_list('id', flat=True).first()
+        active = PartUnified.objects.filter(is_active=True).values_list('id', flat=True).first()
+        for listing_reads in (True, False):
+            with self.settings(PART_LISTING_READS=listing_reads):
+                cache.clear()
+                for name in ('part-detail', 'async-part-detail'):
+                    self.assertEqual(self.client.get(reverse(name, args=[inactive])).status_code, 404)
+                    self.assertEqual(self.client.get(reverse(name, args=[active])).status_code, 200)
+
+    def test_parallel_import_matches_serial(self):
+        process_uploaded_json_delta(self.feed, batch_size=100, processes=1)
+        serial = self.snapshot()
+        PartUnified.objects.all().delete()
+
+        report = process_uploaded_json_delta(self.feed, batch_size=100, processes=2, shard_size=7)
+        self.assertEqual(report['errors'], [])
+        self.assertEqual(self.snapshot(), serial)
+
+
+class TMKB2BSyncTests(TestCase):
+    def test_summary_counts_each_kind_of_row(self):
+        PartUnified.objects.create(name="old", commercial_code="100", internal_code="1", price=10)
+        PartUnified.objects.create(name="same", commercial_code="200", internal_code="2", price=20)
+        items = [
+            {"tegaratCode": "100", "name": "old", "price": "15"},
+            {"tegaratCode": "200", "name": "same", "price": 20},
+            {"tegaratCode": "300", "name": "new", "price": 30, "ekhtesasiCode": "3"},
+            # تکراری: مقدار آخر فایل معتبر است
+            {"tegaratCode": "300", "name": "new v2", "price": 31, "ekhtesasiCode": "3"},
+            {"name": "no code", "price": 40},
+            {"tegaratCode": "500", "name": "bad price", "price": "n/a"},
+        ]
+        handle, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False)
+        self.addCleanup(os.remove, path)
+
+        summary = manage_tmkb2b(path, batch_size=2)
+        self.assertEqual(summary, {"created": 1, "updated": 1, "unchanged": 1, "skipped": 3, "errors": []})
+        self.assertEqual(
+            list(PartUnified.objects.order_by('commercial_code').values_list('commercial_code', 'name', 'price')),
+            [("100", "old", 15), ("200", "same", 20), ("300", "new v2", 31)],
+        )
+
+
+class ImportJobReclaimTests(TestCase):
+    def job(self, state, minutes_ago, staged=True):
+        path = ""
+        if staged:
+            handle, path = tempfile.mkstemp(suffix='.json')
+            os.close(handle)
+            self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        job = ImportJob.objects.create(kind='tmkb2b', state=state, file_name="allData.json", file_path=path)
+        ImportJob.objects.filter(pk=job.pk).update(updated_time=timezone.now() - timedelta(minutes=minutes_ago))
+        return job
+
+    def test_abandoned_jobs_fail_or_requeue(self):
+        running = self.job('running', 60)
+        queued = self.job('queued', 60, staged=False)
+        alive = self.job('running', 1)
+        done = self.job('succeeded', 60)
+
+        self.assertEqual(reclaim_stale_jobs(stale_after=600), [])
+        states = dict(ImportJob.objects.values_list('id', 'state'))
+        self.assertEqual(
+            [states[job.pk] for job in (running, queued, alive, done)], ['failed', 'failed', 'running', 'succeeded']
+        )
+        self.assertEqual(ImportJob.objects.get(pk=running.pk).errors, [ABANDONED_JOB_ERROR])
+        self.assertFalse(os.path.exists(running.file_path))
+
+    def test_requeue_claims_jobs_with_a_staged_file(self):
+        running = self.job('running', 60)
+        missing = self.job('queued', 60, staged=False)
+        self.assertEqual(reclaim_stale_jobs(stale_after=600, requeue=True), [running.pk])
+        # heartbeat تازه شده؛ process دیگری همان job را دوباره برنمی‌دارد
+        self.assertEqual(reclaim_stale_jobs(stale_after=600, requeue=True), [])
+        self.assertEqual(ImportJob.objects.get(pk=running.pk).state, 'queued')
+        self.assertEqual(ImportJob.objects.get(pk=missing.pk).state, 'failed')
+
+    def test_jobs_queued_in_a_live_pool_keep_a_heartbeat(self):
+        running = self.job('running', 0)
+        waiting = self.job('queued', 60)
+        started_at = ImportJob.objects.get(pk=running.pk).started_at
+        # job در صف pool همین process منتظر import در حال اجرا است
+        with mock.patch('products.jobs._pending_jobs', {waiting.pk}):
+            _progress_updater(running.pk, started_at, 0)({"rows": 10})
+        self.assertEqual(reclaim_stale_jobs(stale_after=600), [])
+        self.assertEqual(ImportJob.objects.get(pk=waiting.pk).state, 'queued')
+        self.assertTrue(os.path.exists(waiting.file_path))
+
+    def test_only_queued_jobs_are_claimed_once(self):
+        queued = self.job('queued', 0)
+        failed = self.job('failed', 0)
+        runs = []
+        with mock.patch.dict(IMPORTERS, {'tmkb2b': lambda path, progress: runs.append(path) or {"errors": []}}):
+            self.assertTrue(_execute(ImportJob.objects.get(pk=queued.pk)))
+            # همان job از صف process دیگر (requeue) یا job ای که reclaim و failed شده دوباره اجرا نمی‌شود
+            self.assertFalse(_execute(ImportJob.objects.get(pk=queued.pk)))
+            self.assertFalse(_execute(ImportJob.objects.get(pk=failed.pk)))
+        self.assertEqual(runs, [queued.file_path])
+        states = dict(ImportJob.objects.values_list('id', 'state'))
+        self.assertEqual((states[queued.pk], states[failed.pk]), ('succeeded', 'failed'))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        # قیمت‌های تکراری تا ترتیب ثانویه روی id هم تست شود
+        PartUnified.objects.bulk_create([
+            PartUnified(name=f"part {n}", commercial_code=f"c{n}", internal_code=f"i{n}", price=(n % 7) * 1000)
+            for n in range(53)
+        ])
+
+    def walk(self, ordering):
+        paginator = KeysetPagination(ordering, page_size=10)
+        pages, cursor = [], None
+        while True:
+            rows, cursor, previous = paginator.paginate(PartUnified.objects.all(), cursor)
+            pages.append((rows, previous))
+            if cursor is None:
+                return paginator, pages
+
+    def test_forward_walk_matches_offset_ordering(self):
+        for ordering in KeysetPagination.orderings:
+            paginator, pages = self.walk(ordering)
+            expected = list(PartUnified.objects.order_by(*paginator.fields).values_list('id', flat=True))
+            self.assertEqual([row.id for rows, _ in pages for row in rows], expected, ordering)
+            self.assertEqual(len(pages), 6)
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        paginator, pages = self.walk('-price')
+        self.assertIsNone(pages[0][1])
+        for index in range(1, len(pages)):
+            rows, _, _ = paginator.paginate(PartUnified.objects.all(), pages[index][1])
+            self.assertEqual([row.id for row in rows], [row.id for row in pages[index - 1][0]])
+
+
+class PartCountCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        PartUnified.objects.bulk_create([
+            PartUnified(name=f"part {n}", commercial_code=f"c{n}", internal_code=f"i{n}", price=1000,
+                        part_type='spare' if n % 3 else 'consumable')
+            for n in range(12)
+        ])
+        # bulk_create سیگنال ندارد؛ مثل import ها read model جدا ساخته می‌شود
+        rebuild_listings()
+
+    def test_count_is_cached_per_signature(self):
+        spare = PartUnified.objects.filter(part_type='spare', is_active=True)
+        self.assertEqual(part_count(spare, count_signature(part_type='spare')), (8, True))
+        with self.assertNumQueries(0):
+            self.assertEqual(part_count(spare, count_signature(part_type='spare')), (8, True))
+
+        response = self.client.post(reverse('filter-parts-by-type'), {'part_type': 'consumable'}, content_type='application/json')
+        self.assertEqual((response.data['count'], response.data['count_exact']), (4, True))
+
+    def test_edit_invalidates_and_estimate_serves_last_count(self):
+        queryset = PartUnified.objects.filter(is_active=True)
+        self.assertEqual(part_count(queryset, count_signature()), (12, True))
+
+        PartUnified.objects.create(name="new", commercial_code="n", internal_code="n", price=1)
+        self.assertEqual(part_count(queryset, count_signature(), estimate=True), (12, False))
+        self.assertEqual(part_count(queryset, count_signature()), (13, True))
+
+        response = self.client.get(reverse('all-parts'), {'count': 'estimated'})
+        self.assertEqual((response.data['count'], response.data['count_exact']), (13, True))
+
+    def test_no_count_key_is_stored_without_a_timeout(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            part_count(PartUnified.objects.filter(is_active=True), count_signature(part_type='spare'))
+        self.assertEqual(cache_set.call_count, 2)
+        self.assertNotIn(None, [call.kwargs['timeout'] for call in cache_set.call_args_list])
+
+
+class CatalogFixtureTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        brand = CarBrandsModel.objects.create(name="irankhodro")
+        cls.cars = [CarsModel.objects.create(name=f"car {n}", code=f"car-{n}", brand=brand) for n in range(3)]
+        cls.root = PartCategory.objects.create(name="root")
+        cls.category = PartCategory.objects.create(name="leaf", parent=cls.root)
+        cls.parts = PartUnified.objects.bulk_create([
+            PartUnified(name=f"part {n}", commercial_code=f"c{n}", internal_code=f"i{n}", price=n * 1000,
+                        part_type='spare', category=cls.category, category_url="https://isaco.ir/")
+            for n in range(60)
+        ])
+        for part in cls.parts:
+            part.cars.set(cls.cars[:2])
+        cls.job = ImportJob.objects.create(kind='catalog', file_name="final_output.json", file_path="")
+
+    def post(self, name, data, query=''):
+        return self.client.post(reverse(name) + query, data, content_type='application/json')
+
+
+class QueryBudgetTests(CatalogFixtureTestCase):
+    """
+    Every endpoint in urls.py runs a fixed number of queries, whatever the page size.
+    """
+
+    def setUp(self):
+        # count ها از cache خوانده نشوند تا کوئری count هم شمرده شود
+        cache.clear()
+
+    def assertBudget(self, queries, request):
+        for page_size in (5, 50):
+            cache.clear()
+            with self.assertNumQueries(queries):
+                response = request(page_size)
+            self.assertEqual(response.status_code, 200, response.data)
+
+    def test_part_lists(self):
+        car_id, category_id = self.cars[0].id, self.category.id
+        # count + صفحه (دسته و ماشین‌ها داخل همان کوئری values)
+        self.assertBudget(2, lambda size: self.client.get(reverse('all-parts'), {'pagesize': size}))
+        self.assertBudget(2, lambda size: self.client.get(reverse('parts-list'), {'page_size': size}))
+        self.assertBudget(2, lambda size: self.post('filter-parts-by-type', {'part_type': 'spare'}, f'?pagesize={size}'))
+        # ماشین + count + صفحه
+        self.assertBudget(3, lambda size: self.post('list-car-products', {'car_id': car_id, 'page_size': size}))
+        # دسته + count + صفحه
+        self.assertBudget(3, lambda size: self.post('products-by-category', {'id': category_id, 'page_size': size}))
+        self.assertBudget(3, lambda size: self.post(
+            'products-by-category', {'id': category_id, 'include_descendants': True, 'page_size': size}
+        ))
+
+    def test_cursor_pages(self):
+        self.assertBudget(1, lambda size: self.client.get(
+            reverse('all-parts'), {'pagination': 'cursor', 'ordering': '-price', 'pagesize': size}
+        ))
+        self.assertBudget(2, lambda size: self.post(
+            'list-car-products', {'car_id': self.cars[0].id, 'pagination': 'cursor', 'ordering': 'inventory', 'page_size': size}
+        ))
+
+        self.assertBudget(1, lambda size: self.client.get(
+            reverse('parts-list'), {'pagination': 'cursor', 'ordering': 'price', 'page_size': size}
+        ))
+
+    def test_single_object_endpoints(self):
+        self.assertBudget(1, lambda size: self.client.get(reverse('part-detail', args=[self.parts[0].id])))
+        self.assertBudget(2, lambda size: self.client.get(reverse('list-brands')))
+        self.assertBudget(1, lambda size: self.client.get(reverse('category-list')))
+        self.assertBudget(1, lambda size: self.client.get(reverse('category-tree')))
+        self.assertBudget(1, lambda size: self.client.get(reverse('import-job-detail', args=[self.job.id])))
+        self.assertBudget(1, lambda size: self.post('lookup-codes', {'codes': ['c1', 'i2'], 'limit': size}))
+        self.assertBudget(1, lambda size: self.post(
+            'part-batch-detail', {'ids': [part.id for part in self.parts[:size]], 'codes': ['c1', 'missing']}
+        ))
+        # سه GROUP BY + دسته‌ها + نام ماشین‌ها (و خود دسته فیلتر)
+        self.assertBudget(5, lambda size: self.client.get(reverse('facet-counts')))
+        self.assertBudget(6, lambda size: self.client.get(
+            reverse('facet-counts'), {'category_id': self.root.id, 'brand_id': self.cars[0].brand_id}
+        ))
+
+    def test_upload_stages_one_job(self):
+        upload = SimpleUploadedFile("allData.json", b"[]", content_type="application/json")
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('upload-json'), {'file': upload})
+        self.assertEqual(response.status_code, 202)
+        os.remove(ImportJob.objects.get(id=response.data['job_id']).file_path)
+
+
+class CursorModeTests(CatalogFixtureTestCase):
+    """
+    Cursor pages carry the same rows and payload as the offset pages of the same endpoint.
+    """
+
+    def walk(self, request):
+        results, cursor = [], None
+        while True:
+            response = request({'cursor': cursor} if cursor else {'pagination': 'cursor'})
+            self.assertEqual(response.status_code, 200, response.data)
+            results.extend(response.data['results'])
+            cursor = response.data['next']
+            if cursor is None:
+                return results
+
+    def test_cursor_walk_matches_offset_page(self):
+        for listing_reads in (True, False):
+            with self.settings(PART_LISTING_READS=listing_reads):
+                offset = self.client.get(reverse('all-parts'), {'pagesize': 100}).data['results']
+                self.assertEqual(len(offset), 60)
+                self.assertEqual(self.walk(lambda params: self.client.get(
+                    reverse('all-parts'), {**params, 'ordering': 'id', 'pagesize': 25}
+                )), offset)
+                self.assertEqual(self.walk(lambda params: self.client.get(
+                    reverse('parts-list'), {**params, 'ordering': 'id', 'page_size': 25}
+                )), offset)
+
+    def test_car_parts_offset_pages_follow_the_cursor_order(self):
+        car_id = self.cars[0].id
+        offset = []
+        for page in (1, 2, 3):
+            response = self.post('list-car-products', {'car_id': car_id, 'page_number': page, 'page_size': 25})
+            offset.extend(response.data['results'])
+        self.assertEqual([row['id'] for row in offset], sorted(part.id for part in self.parts))
+        cursor = self.walk(lambda params: self.post('list-car-products', {'car_id': car_id, **params, 'page_size': 25}))
+        self.assertEqual(cursor, offset)
+
+    def test_parts_list_cursor_keeps_filters(self):
+        params = {'category_id': self.category.id, 'price_min': 10000, 'price_max': 20000, 'ordering': '-price'}
+        offset = self.client.get(reverse('parts-list'), {**params, 'page_size': 100}).data['results']
+        self.assertEqual(len(offset), 11)
+        self.assertEqual(self.walk(lambda cursor: self.client.get(
+            reverse('parts-list'), {**params, **cursor, 'page_size': 4}
+        )), offset)
+
+
+class QueryPlanTests(CatalogFixtureTestCase):
+    """
+    No endpoint query reads the parts or part-car tables without an index.
+    """
+
+    tables = {PartUnified._meta.db_table, PartUnified.cars.through._meta.db_table, PartListing._meta.db_table}
+
+    def assertIndexed(self, request):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertEqual(response.status_code, 200, response.data)
+        for query in queries.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                self.assertEqual(full_scans(query['sql'], tables=self.tables), [], query['sql'])
+
+    def test_endpoints_use_indexes(self):
+        car_id, category_id = self.cars[0].id, self.category.id
+        first = self.client.get(reverse('all-parts'), {'pagination': 'cursor', 'ordering': '-inventory'})
+        requests = [
+            lambda: self.client.get(reverse('all-parts')),
+            lambda: self.client.get(reverse('all-parts'), {'cursor': first.data['next'], 'ordering': '-inventory'}),
+            lambda: self.client.get(reverse('parts-list'), {'category_id': category_id}),
+            lambda: self.client.get(reverse('parts-list'), {'ordering': 'price'}),
+            lambda: self.client.get(reverse('parts-list'), {'search': 'part'}),
+            lambda: self.client.get(reverse('parts-list'), {'pagination': 'cursor', 'ordering': 'price'}),
+            lambda: self.client.get(reverse('parts-list'), {'price_min': 1000, 'price_max': 9000, 'ordering': 'price'}),
+            lambda: self.client.get(reverse('parts-list'), {
+                'category_id': category_id, 'price_min': 1000, 'in_stock': 'true', 'ordering': '-price',
+            }),
+            lambda: self.post('filter-parts-by-type', {'part_type': 'spare'}),
+            lambda: self.post('filter-parts-by-type', {'part_type': 'spare'}, '?pagination=cursor&ordering=price'),
+            lambda: self.post('list-car-products', {'car_id': car_id}),
+            lambda: self.post('list-car-products', {'car_id': car_id, 'pagination': 'cursor'}),
+            lambda: self.post('products-by-category', {'id': category_id}),
+            lambda: self.post('products-by-category', {'id': self.root.id, 'include_descendants': True}),
+            lambda: self.client.get(reverse('part-detail', args=[self.parts[0].id])),
+            lambda: self.post('lookup-codes', {'codes': ['c1', 'i2']}),
+            lambda: self.post('part-batch-detail', {'ids': [self.parts[0].id], 'codes': ['c1', 'c2']}),
+            lambda: self.post('lookup-codes', {'codes': ['c10'], 'mode': 'prefix'}),
+            lambda: self.post('lookup-codes', {'codes': ['c10', 'i20', 'c30'], 'mode': 'prefix', 'limit': 2}),
+            lambda: self.client.get(reverse('facet-counts'), {'car_id': car_id, 'part_type': 'spare'}),
+            lambda: self.client.get(reverse('facet-counts'), {'category_id': self.root.id}),
+        ]
+        for request in requests:
+            cache.clear()
+            self.assertIndexed(request)
+
+    def test_detects_full_scan(self):
+        sql, params = PartUnified.objects.filter(name="part 1").query.sql_with_params()
+        self.assertEqual(full_scans(sql, params, tables=self.tables), [PartUnified._meta.db_table])
+
+
+class PartSearchTests(TestCase):
+    def setUp(self):
+        self.part = PartUnified.objects.create(
+            name="درب موتور سفید كد 29020-پژو۲۰۷ ايساكو", commercial_code="2901000100", internal_code="1001",
+            price=1000, category_title="بدنه", category_url="https://isaco.ir/",
+        )
+        PartUnified.objects.create(
+            name="لنت ترمز جلو پژو 206", commercial_code="2902000200", internal_code="1002",
+            price=1000, category_title="ترمز", category_url="https://isaco.ir/",
+        )
+
+    def search(self, term):
+        response = self.client.get(reverse('parts-list'), {'search': term})
+        return [part['id'] for part in response.data['results']]
+
+    def test_normalization(self):
+        self.assertEqual(normalize_persian("پژو۲۰۷ كيا"), normalize_persian("پژو 207 کیا"))
+        self.assertEqual(normalize_persian("می‌شود"), "می شود")
+
+    def test_search_is_normalized_and_prefix(self):
+        self.assertEqual(search_enabled(), True)
+        self.assertEqual(self.search("پژو 207"), [self.part.id])
+        self.assertEqual(self.search("ایساکو کد"), [self.part.id])
+        self.assertEqual(self.search("29010"), [self.part.id])
+        self.assertEqual(len(self.search("پژ")), 2)
+
+    def test_edit_and_delete_keep_index_in_sync(self):
+        self.part.name = "کاپوت"
+        self.part.save()
+        self.assertEqual(self.search("درب موتور"), [])
+        self.assertEqual(self.search("کاپوت"), [self.part.id])
+
+        self.part.delete()
+        self.assertEqual(self.search("کاپوت"), [])
+
+
+class PartCodeLookupTests(TestCase):
+    def setUp(self):
+        self.parts = PartUnified.objects.bulk_create([
+            PartUnified(name=f"part {n}", commercial_code=f"29010001{n:02d}", internal_code=f"10{n:02d}", price=1000)
+            for n in range(12)
+        ])
+
+    def lookup(self, **body):
+        return self.client.post(reverse('lookup-codes'), body, content_type='application/json')
+
+    def test_exact_lookup_groups_by_code_and_reports_missing(self):
+        with self.assertNumQueries(1):
+            response = self.lookup(codes=["2901000103", "1005", "404"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']["2901000103"]], [self.parts[3].id])
+        self.assertEqual([row['id'] for row in response.data['results']["1005"]], [self.parts[5].id])
+        self.assertEqual(response.data['not_found'], ["404"])
+
+    def test_prefix_lookup(self):
+        response = self.lookup(codes=["290100011"], mode="prefix", field="commercial")
+        self.assertEqual(sorted(row['id'] for row in response.data['results']["290100011"]), [self.parts[10].id, self.parts[11].id])
+        self.assertEqual(self.lookup(codes=["29"], mode="prefix").status_code, 400)
+        self.assertEqual(len(self.lookup(codes=["2901"], mode="prefix", limit=5).data['results']["2901"]), 5)
+
+    def test_limit_applies_per_prefix_and_never_to_exact_codes(self):
+        codes = [part.commercial_code for part in self.parts]
+        with self.assertNumQueries(1):
+            response = self.lookup(codes=codes, limit=3)
+        self.assertEqual(response.data['not_found'], [])
+        self.assertEqual(sum(len(rows) for rows in response.data['results'].values()), 12)
+
+        with self.assertNumQueries(1):
+            response = self.lookup(codes=["2901", "290100011"], mode="prefix", field="commercial", limit=3)
+        self.assertEqual(len(response.data['results']["2901"]), 3)
+        self.assertEqual(len(response.data['results']["290100011"]), 2)
+
+
+class PartBatchDetailTests(CatalogFixtureTestCase):
+    def test_results_are_keyed_by_requested_identifier(self):
+        first, second = self.parts[:2]
+        response = self.post('part-batch-detail', {'ids': [first.id, 999999], 'codes': ['c1', 'nope']})
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(results['ids'][first.id], self.client.get(reverse('part-detail', args=[first.id])).data)
+        self.assertIsNone(results['ids'][999999])
+        self.assertEqual(results['codes']['c1']['id'], second.id)
+        self.assertEqual(results['codes']['c1']['car_names'], ["car 0", "car 1"])
+        self.assertEqual(response.data['not_found'], {'ids': [999999], 'codes': ['nope']})
+
+        # بدون read model: محصولات با دسته + prefetch ماشین‌ها و همان پاسخ
+        with self.settings(PART_LISTING_READS=False), self.assertNumQueries(2):
+            fallback = self.post('part-batch-detail', {'ids': [first.id, 999999], 'codes': ['c1', 'nope']})
+        self.assertEqual(fallback.data, response.data)
+
+    def test_inactive_parts_are_not_found(self):
+        inactive = self.parts[2]
+        inactive.is_active = False
+        inactive.save()
+        for listing_reads in (True, False):
+            with self.settings(PART_LISTING_READS=listing_reads):
+                response = self.post('part-batch-detail', {'ids': [inactive.id, self.parts[3].id], 'codes': ['c2', 'c3']})
+            self.assertIsNone(response.data['results']['ids'][inactive.id])
+            self.assertIsNone(response.data['results']['codes']['c2'])
+            self.assertEqual(response.data['not_found'], {'ids': [inactive.id], 'codes': ['c2']})
+
+    def test_validation(self):
+        self.assertEqual(self.post('part-batch-detail', {}).status_code, 400)
+        self.assertEqual(self.post('part-batch-detail', {'ids': list(range(1, 302))}).status_code, 400)
+
+
+class PartRangeFilterTests(CatalogFixtureTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def ids(self, **params):
+        response = self.client.get(reverse('parts-list'), {'page_size': 100, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['id'] for row in response.data['results']]
+
+    def test_price_and_inventory_filters(self):
+        PartUnified.objects.filter(id__in=[part.id for part in self.parts[:10]]).update(inventory=5)
+        PartUnified.objects.filter(id=self.parts[0].id).update(inventory=50)
+        rebuild_listings()
+        rebuild_search_index()
+        ids = [part.id for part in self.parts]
+
+        self.assertEqual(self.ids(price_min=5000, price_max=8000, ordering='-price'), ids[8:4:-1])
+        self.assertEqual(self.ids(in_stock='true', ordering='price'), ids[:10])
+        self.assertEqual(len(self.ids(in_stock='false')), 50)
+        self.assertEqual(self.ids(inventory_min=10, category_id=self.category.id), ids[:1])
+        self.assertEqual(self.ids(in_stock='true', price_min=3000, search='part'), ids[3:10])
+        # count هر ترکیب فیلتر جدا cache می‌شود
+        self.assertEqual(self.client.get(reverse('parts-list'), {'price_max': 2000}).data['count'], 3)
+        self.assertEqual(self.client.get(reverse('parts-list'), {'price_max': 4000}).data['count'], 5)
+
+    def test_pages_default_to_id_order(self):
+        PartUnified.objects.filter(id=self.parts[0].id).update(price=999999)
+        rebuild_listings()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            self.assertEqual(self.ids(), [part.id for part in self.parts])
+            self.assertEqual(self.ids(price_min=5000), [part.id for part in self.parts[:1] + self.parts[5:]])
+
+    def test_invalid_ranges(self):
+        for params in ({'price_min': 10, 'price_max': 5}, {'price_min': -1}, {'in_stock': 'maybe'}):
+            self.assertEqual(self.client.get(reverse('parts-list'), params).status_code, 400)
+            self.assertEqual(self.client.get(reverse('async-parts-list'), params).status_code, 400)
+
+    def test_range_ordered_by_price_needs_no_sort(self):
+        for params in ({'price_min': 1000, 'price_max': 9000}, {'category_id': self.category.id, 'price_min': 1000}):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('parts-list'), {**params, 'ordering': 'price'})
+            plan = explain_query_plan(queries.captured_queries[-1]['sql'])
+            self.assertFalse([line for line in plan if 'ORDER BY' in line], plan)
+
+
+class CategorySubtreeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = PartCategory.objects.create(name="لوازم یدکی")
+        self.engine = PartCategory.objects.create(name="موتور", parent=self.root)
+        self.filters = PartCategory.objects.create(name="فیلتر", parent=self.engine)
+        self.body = PartCategory.objects.create(name="بدنه", parent=self.root)
+        other = PartCategory.objects.create(name="دیگر")
+        for n, category in enumerate([self.root, self.engine, self.filters, self.filters, self.body, other]):
+            PartUnified.objects.create(
+                name=f"part {n}", commercial_code=f"c{n}", internal_code=f"i{n}", price=1000, category=category,
+                is_active=n != 3,
+            )
+
+    def products(self, category, **body):
+        response = self.client.post(
+            reverse('products-by-category'), {'id': category.id, **body}, content_type='application/json'
+        )
+        return response.data['count'], [part['name'] for part in response.data['results']]
+
+    def test_include_descendants_lists_the_subtree(self):
+        self.assertEqual(self.products(self.engine), (1, ["part 1"]))
+        self.assertEqual(self.products(self.engine, include_descendants=True), (2, ["part 1", "part 2"]))
+        self.assertEqual(self.products(self.root, include_descendants=True)[0], 4)
+
+    def test_rolled_up_counts_seed_the_list_counts(self):
+        counts = category_product_counts()
+        self.assertEqual(counts[self.root.id], (1, 4))
+        self.assertEqual(counts[self.engine.id], (1, 2))
+        self.assertEqual(counts[self.filters.id], (1, 1))
+
+        queryset = PartUnified.objects.filter(is_active=True)
+        with self.assertNumQueries(0):
+            self.assertEqual(part_count(queryset, count_signature(category=self.root.id, descendants=1)), (4, True))
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = PartCategory.objects.create(name="لوازم یدکی")
+        self.engine = PartCategory.objects.create(name="موتور", parent=self.root)
+        self.filters = PartCategory.objects.create(name="فیلتر", parent=self.engine)
+        self.body = PartCategory.objects.create(name="بدنه", parent=self.root)
+        self.other = PartCategory.objects.create(name="دیگر")
+
+    def tree(self, **params):
+        response = self.client.get(reverse('category-tree'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_names_are_unique_per_parent_and_among_roots(self):
+        PartCategory.objects.create(name="موتور", parent=self.body)
+        for parent in (self.root, None):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                PartCategory.objects.create(name="موتور" if parent else "دیگر", parent=parent)
+
+    def test_nested_forest_with_root_and_depth(self):
+        forest = self.tree()
+        # order_insertion_by = name، برای ریشه‌ها هم
+        self.assertEqual([node['name'] for node in forest], ["دیگر", "لوازم یدکی"])
+        self.assertEqual([node['name'] for node in forest[1]['children']], ["بدنه", "موتور"])
+        self.assertEqual(forest[1]['children'][1]['children'][0]['id'], self.filters.id)
+
+        self.assertEqual(self.tree(root=self.engine.id), [
+            {"id": self.engine.id, "name": "موتور", "children": [{"id": self.filters.id, "name": "فیلتر", "children": []}]}
+        ])
+        self.assertEqual([len(node['children']) for node in self.tree(depth=0)], [0, 0])
+        self.assertEqual(self.tree(root=self.root.id, depth=1)[0]['children'][1]['children'], [])
+        self.assertEqual(self.client.get(reverse('category-tree'), {'depth': -1}).status_code, 400)
+
+    def test_tree_is_cached_until_a_category_changes(self):
+        self.tree()
+        with self.assertNumQueries(0):
+            self.tree()
+        PartCategory.objects.create(name="برقی", parent=self.root)
+        self.assertEqual(len(self.tree()[1]['children']), 3)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.brand = CarBrandsModel.objects.create(name="irankhodro")
+        self.car = CarsModel.objects.create(name="سمند", code="samand", brand=self.brand)
+        self.part = PartUnified.objects.create(name="part", commercial_code="c1", internal_code="i1", price=1000)
+        self.part.cars.set([self.car])
+
+    def test_payloads_are_cached_until_a_related_save(self):
+        detail = reverse('part-detail', args=[self.part.id])
+        self.client.get(reverse('list-brands'))
+        self.client.get(detail)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('list-brands'))
+            self.assertEqual(self.client.get(detail).data['car_names'], ["سمند"])
+
+        self.car.name = "سمند سورن"
+        self.car.save()
+        self.assertEqual(self.client.get(reverse('list-brands')).data[0]['cars'][0]['name'], "سمند سورن")
+        self.assertEqual(self.client.get(detail).data['car_names'], ["سمند سورن"])
+
+        self.part.price = 2000
+        self.part.save()
+        self.assertEqual(self.client.get(detail).data['price'], 2000)
+
+    def test_car_links_invalidate_only_the_affected_parts(self):
+        other = PartUnified.objects.create(name="other", commercial_code="c2", internal_code="i2", price=1000)
+        detail, other_detail = reverse('part-detail', args=[self.part.id]), reverse('part-detail', args=[other.id])
+        car = CarsModel.objects.create(name="رانا", code="rana", brand=self.brand)
+        self.client.get(detail)
+        self.client.get(other_detail)
+
+        self.part.cars.add(car)
+        with self.assertNumQueries(0):
+            self.client.get(other_detail)
+        self.assertEqual(self.client.get(detail).data['car_names'], ["سمند", "رانا"])
+
+        car.parts.add(other)
+        with self.assertNumQueries(0):
+            self.client.get(detail)
+        self.assertEqual(self.client.get(other_detail).data['car_names'], ["رانا"])
+
+        car.parts.clear()
+        self.assertEqual(self.client.get(detail).data['car_names'], ["سمند"])
+        self.assertEqual(self.client.get(other_detail).data['car_names'], [])
+
+    def test_evicted_version_never_serves_an_older_payload(self):
+        cache.delete(BRANDS.version_key)
+        self.client.get(reverse('list-brands'))
+        self.car.name = "سمند سورن"
+        self.car.save()
+        self.assertEqual(self.client.get(reverse('list-brands')).data[0]['cars'][0]['name'], "سمند سورن")
+        # کلید version حذف شد (eviction)؛ payload های نسخه‌های قبلی هنوز در cache هستند
+        cache.delete(BRANDS.version_key)
+        CarsModel.objects.filter(id=self.car.id).update(name="سمند LX")
+        self.assertEqual(self.client.get(reverse('list-brands')).data[0]['cars'][0]['name'], "سمند LX")
+
+    def test_import_warms_the_catalog(self):
+        feed = write_sample_feed(categories=10)
+        self.addCleanup(os.remove, feed)
+        process_uploaded_json_delta(feed)
+        with self.assertNumQueries(0):
+            brands = self.client.get(reverse('list-brands')).data
+            self.client.get(reverse('category-list'))
+            self.client.get(reverse('category-tree'))
+        self.assertEqual(len(brands), CarBrandsModel.objects.count())
+
+
+class FastSerializerTests(TestCase):
+    def assertSameJSON(self, queryset):
+        expected = JSONRenderer().render(PartUnifiedSerializer(
+            PartUnifiedSerializer.setup_eager_loading(queryset), many=True
+        ).data)
+        actual = JSONRenderer().render(FastPartUnifiedSerializer(
+            FastPartUnifiedSerializer.setup_eager_loading(queryset), many=True
+        ).data)
+        self.assertEqual(actual, expected)
+
+    def test_matches_model_serializer_on_sample_feed(self):
+        feed = write_sample_feed(categories=40)
+        self.addCleanup(os.remove, feed)
+        process_uploaded_json_delta(feed)
+        # حالت‌هایی که در فید نمونه کم هستند: بدون دسته، بدون ماشین، موجودی کم، گارانتی و توضیحات
+        brand = CarBrandsModel.objects.create(name="test")
+        late, early = (CarsModel.objects.create(name=name, code=name, brand=brand) for name in ("ب", "الف"))
+        parts = list(PartUnified.objects.order_by('id')[:4])
+        parts[0].category = None
+        parts[1].cars.clear()
+        parts[2].inventory, parts[2].has_warranty, parts[2].warranty_name = 3, True, "گارانتی ۱۲ ماهه"
+        parts[3].description, parts[3].image_urls = "توضیح \"ویژه\"", []
+        for part in parts:
+            part.save()
+        parts[2].cars.add(early, late)
+
+        queryset = PartUnified.objects.order_by('id')
+        self.assertGreater(queryset.count(), 100)
+        self.assertSameJSON(queryset)
+        self.assertSameJSON(queryset.filter(id__in=[part.id for part in parts]))
+
+    def test_list_endpoint_output(self):
+        category = PartCategory.objects.create(name="لنت")
+        part = PartUnified.objects.create(name="لنت جلو", commercial_code="c1", internal_code="i1",
+                                          price=1000, inventory=2, category=category)
+        response = self.client.get(reverse('all-parts'))
+        self.assertEqual(response.data['results'], [PartUnifiedSerializer(part).data])
+
+
+class PartListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.brand = CarBrandsModel.objects.create(name="irankhodro")
+        self.car = CarsModel.objects.create(name="سمند", code="samand", brand=self.brand)
+        self.root = PartCategory.objects.create(name="موتور")
+        self.category = PartCategory.objects.create(name="فیلتر", parent=self.root)
+        self.part = PartUnified.objects.create(name="فیلتر روغن", commercial_code="c1", internal_code="i1",
+                                               price=1000, inventory=3, category=self.category)
+        self.part.cars.set([self.car])
+
+    def listing(self):
+        return PartListing.objects.get(id=self.part.id)
+
+    def test_saves_keep_the_listing_in_sync(self):
+        listing = self.listing()
+        self.assertEqual(listing.category_path, ["موتور", "فیلتر"])
+        self.assertEqual((listing.car_ids, listing.car_names, listing.brand_ids), ([self.car.id], ["سمند"], [self.brand.id]))
+        self.assertEqual(listing.inventory_warning, PartUnified.LOW_INVENTORY_WARNING)
+
+        self.root.name = "موتوری"
+        self.root.save()
+        self.car.name = "سمند سورن"
+        self.car.save()
+        self.part.inventory = 10
+        self.part.save()
+        listing = self.listing()
+        self.assertEqual((listing.category_path, listing.car_names, listing.inventory_warning),
+                         (["موتوری", "فیلتر"], ["سمند سورن"], ""))
+
+        self.car.parts.clear()
+        self.assertEqual(self.listing().car_ids, [])
+        self.part.delete()
+        self.assertFalse(PartListing.objects.exists())
+
+    def test_matches_model_serializer_after_import(self):
+        feed = write_sample_feed(categories=40)
+        self.addCleanup(os.remove, feed)
+        process_uploaded_json_delta(feed)
+        self.assertEqual(PartListing.objects.count(), PartUnified.objects.count())
+
+        expected = JSONRenderer().render(PartUnifiedSerializer(
+            PartUnifiedSerializer.setup_eager_loading(PartUnified.objects.order_by('id')), many=True
+        ).data)
+        actual = JSONRenderer().render(PartListingSerializer(
+            PartListingSerializer.setup_eager_loading(PartListing.objects.order_by('id')), many=True
+        ).data)
+        self.assertEqual(actual, expected)
+
+
+class FacetCountsTests(CatalogFixtureTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        response = self.client.get(reverse('facet-counts'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_counts_follow_the_filters(self):
+        other = PartCategory.objects.create(name="other")
+        PartUnified.objects.create(name="oil", commercial_code="oil", price=10, part_type='consumable', turnover='A',
+                                   has_warranty=True, category=other, category_url="https://isaco.ir/")
+        PartUnified.objects.create(name="old", commercial_code="old", price=10, category=other, is_active=False,
+                                   category_url="https://isaco.ir/")
+
+        data = self.facets()
+        self.assertEqual(data['count'], 61)
+        self.assertEqual(data['facets']['part_type'], [
+            {"value": 'spare', "label": 'Spare Part', "count": 60},
+            {"value": 'consumable', "label": 'Consumable', "count": 1},
+        ])
+        self.assertEqual(data['facets']['has_warranty'], [{"value": False, "count": 60}, {"value": True, "count": 1}])
+        # دسته‌ها به دسته سطح اول جمع می‌شوند
+        self.assertEqual(data['facets']['category'], [
+            {"id": self.root.id, "name": "root", "count": 60}, {"id": other.id, "name": "other", "count": 1},
+        ])
+        # هر محصول دو ماشین از یک برند دارد؛ برند یک بار شمرده می‌شود
+        self.assertEqual(data['facets']['brand'], [{"id": self.cars[0].brand_id, "name": self.cars[0].brand.display_name, "count": 60}])
+        self.assertEqual(data['facets']['car'], [
+            {"id": car.id, "name": car.name, "count": 60} for car in self.cars[:2]
+        ])
+
+        data = self.facets(has_warranty='true')
+        self.assertEqual((data['count'], data['facets']['car']), (1, []))
+        self.assertEqual(self.facets(category_id=self.root.id, part_type='spare')['count'], 60)
+        self.assertEqual(self.facets(car_id=self.cars[2].id)['count'], 0)
+
+    def test_cached_until_a_part_changes(self):
+        self.facets()
+        with self.assertNumQueries(0):
+            self.facets()
+        self.parts[0].is_active = False
+        self.parts[0].save()
+        self.assertEqual(self.facets()['count'], 59)
+
+    def test_invalid_filters(self):
+        self.assertEqual(self.client.get(reverse('facet-counts'), {'part_type': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('facet-counts'), {'category_id': 999999}).status_code, 404)
+
+
+class PartExportTests(CatalogFixtureTestCase):
+    def export(self, **params):
+        response = self.client.get(reverse('parts-export'), params)
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content)
+        return gzip.decompress(content) if params.get('gzip') else content
+
+    def test_ndjson_and_csv_stream_every_part(self):
+        PartUnified.objects.filter(id=self.parts[1].id).update(is_active=False)
+        rebuild_listings()
+        with self.assertNumQueries(1):
+            rows = [json.loads(line) for line in self.export().decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [part.id for part in self.parts])
+        self.assertEqual(rows[1]['is_active'], False)
+        self.assertEqual(rows[0]['category_path'], ["root", "leaf"])
+        self.assertEqual(rows[0]['car_names'], ["car 0", "car 1"])
+
+        with self.settings(PART_LISTING_READS=False):
+            self.assertEqual([json.loads(line) for line in self.export().decode().splitlines()], rows)
+
+        reader = csv.DictReader(io.StringIO(self.export(output='csv', gzip='true').decode()))
+        csv_rows = list(reader)
+        self.assertEqual(len(csv_rows), 60)
+        self.assertEqual(json.loads(csv_rows[0]['car_names']), ["car 0", "car 1"])
+        self.assertEqual(csv_rows[0]['commercial_code'], "c0")
+
+    def test_updated_since(self):
+        cutoff = timezone.now()
+        PartUnified.objects.update(updated_time=cutoff - timedelta(days=1))
+        self.parts[5].price = 1
+        self.parts[5].save()
+        rebuild_listings()
+        rows = [json.loads(line) for line in self.export(updated_since=cutoff.isoformat()).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.parts[5].id])
+        self.assertEqual(self.client.get(reverse('parts-export'), {'updated_since': 'yesterday'}).status_code, 400)
+
+    def test_command_writes_gzip_file(self):
+        path = os.path.join(tempfile.mkdtemp(), "parts.csv.gz")
+        self.addCleanup(os.remove, path)
+        call_command('export_parts', path, '--output-format', 'csv', '--gzip', stdout=io.StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            self.assertEqual(len(list(csv.DictReader(f))), 60)
+
+
+class AsyncReadViewTests(CatalogFixtureTestCase):
+    """
+    The async (ASGI) read endpoints return exactly what their sync twins return.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    async def assertSameResponse(self, sync_response, async_url, data=None):
+        if data is None:
+            response = await self.async_client.get(async_url)
+        else:
+            response = await self.async_client.post(async_url, data, content_type='application/json')
+        self.assertEqual(response.status_code, sync_response.status_code)
+        # فقط مسیر لینک‌های next/previous فرق دارد
+        self.assertEqual(response.content.replace(b'/api/async/', b'/api/'), sync_response.content)
+
+    async def test_matches_sync_endpoints(self):
+        part_id, category_id = self.parts[0].id, self.category.id
+        for name, async_name, query in [
+            ('list-brands', 'async-list-brands', ''),
+            ('category-list', 'async-category-list', ''),
+            ('parts-list', 'async-parts-list', '?page=2&page_size=7&ordering=-price'),
+            ('parts-list', 'async-parts-list', f'?category_id={category_id}&search=part'),
+            ('parts-list', 'async-parts-list', '?page=99'),
+            ('parts-list', 'async-parts-list', '?price_min=5000&in_stock=false&ordering=-inventory,price'),
+        ]:
+            sync_response = await self.async_client.get(reverse(name) + query)
+            await self.assertSameResponse(sync_response, reverse(async_name) + query)
+
+        # بدون FTS5 هر دو همان جستجوی icontains DRF را اجرا می‌کنند
+        with mock.patch('products.search.search_enabled', return_value=False):
+            query = '?search=part 1&page_size=50'
+            sync_response = await self.async_client.get(reverse('parts-list') + query)
+            self.assertEqual(sync_response.json()['count'], 15)
+            await self.assertSameResponse(sync_response, reverse('async-parts-list') + query)
+
+        for args in ([part_id], [999999]):
+            sync_response = await self.async_client.get(reverse('part-detail', args=args))
+            await self.assertSameResponse(sync_response, reverse('async-part-detail', args=args))
+
+        for body in ({'id': category_id, 'page': 2, 'page_size': 25}, {'id': self.root.id, 'include_descendants': True}):
+            sync_response = await self.async_client.post(
+                reverse('products-by-category'), body, content_type='application/json'
+            )
+            await self.assertSameResponse(sync_response, reverse('async-products-by-category'), body)
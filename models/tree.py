@@ -0,0 +1,28 @@
+from .models import PartCategory
+
+
+def build_category_tree(root=None, depth=None):
+    """
+    درخت تو در توی دسته‌ها با یک کوئری مرتب بر اساس (tree_id, lft) و یک پیمایش خطی؛
+    root (اختیاری) یک PartCategory و depth تعداد سطح‌های زیر گره‌های شروع است
+    """
+    queryset = PartCategory.objects.order_by('tree_id', 'lft')
+    top_level = 0
+    if root is not None:
+        queryset = queryset.filter(tree_id=root.tree_id, lft__gte=root.lft, lft__lte=root.rght)
+        top_level = root.level
+    if depth is not None:
+        queryset = queryset.filter(level__lte=top_level + depth)
+
+    nodes = {}
+    forest = []
+    for category_id, name, parent_id in queryset.values_list('id', 'name', 'parent_id'):
+        node = nodes[category_id] = {"id": category_id, "name": name, "children": []}
+        # به خاطر ترتیب lft والد همیشه قبل از فرزند آمده است
+        parent = nodes.get(parent_id)
+        if parent is None:
+            forest.append(node)
+        else:
+            parent["children"].append(node)
+    return forest
+
@@ -1,6 +1,9 @@
 from django.urls import path
 from .views import *
 from .views import PartUnifiedListAPIView
+from .async_views import (
+    AsyncListOfBrandsView, AsyncCategoryListView, AsyncPartDetailView, AsyncPartListView, AsyncProductByCategoryView
+)
 
 urlpatterns = [
     path('list-brands/', ListOfBrandsAPIView.as_view(), name='list-brands'),
@@ -9,7 +12,20 @@ urlpatterns = [
     path('filter-by-type/', FilterByPartTypeAPIView.as_view(), name='filter-parts-by-type'),
     path('filter-parts/', PartUnifiedListAPIView.as_view(), name='parts-list'),
     path('part/<int:part_id>/', PartDetailAPIView.as_view(), name='part-detail'),
+    path('parts/batch/', PartBatchDetailAPIView.as_view(), name='part-batch-detail'),
+    path('lookup-codes/', PartCodeLookupAPIView.as_view(), name='lookup-codes'),
     path('upload-json/', JSONUploadAPIView.as_view(), name='upload-json'),
+    path('import-jobs/<int:job_id>/', ImportJobDetailAPIView.as_view(), name='import-job-detail'),
     path('products_by_category/', ProductByCategoryAPIView.as_view(), name='products-by-category'),
     path('categories/', CategoryListAPIView.as_view(), name='category-list'),
+    path('categories/tree/', CategoryTreeAPIView.as_view(), name='category-tree'),
+    path('facets/', FacetCountsAPIView.as_view(), name='facet-counts'),
+    path('parts/export/', PartExportAPIView.as_view(), name='parts-export'),
+
+    # async (ASGI) نسخه endpoint های خواندنی
+    path('async/list-brands/', AsyncListOfBrandsView.as_view(), name='async-list-brands'),
+    path('async/categories/', AsyncCategoryListView.as_view(), name='async-category-list'),
+    path('async/filter-parts/', AsyncPartListView.as_view(), name='async-parts-list'),
+    path('async/part/<int:part_id>/', AsyncPartDetailView.as_view(), name='async-part-detail'),
+    path('async/products_by_category/', AsyncProductByCategoryView.as_view(), name='async-products-by-category'),
 ]
\ No newline at end of file
@@ -1,6 +1,5 @@
-import json
-import os
-from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -9,15 +8,25 @@ from rest_framework import generics, filters
 from rest_framework.pagination import PageNumberPagination
 
 from .serializers import (
-    CarBrandWithCarsSerializer, 
     PartSerializer, 
-    PartUnifiedSerializer, 
     JSONUploadSerializer,
-    CategorySerializer, 
-    ProductSerializer)
-from .models import PartUnified, CarBrandsModel, CarsModel, PartCategory
+    ProductSerializer,
+    ImportJobSerializer,
+    CodeLookupSerializer,
+    BatchPartDetailSerializer,
+    FacetFilterSerializer,
+    PartExportSerializer)
+from .models import PartUnified, CarsModel, PartCategory, ImportJob
 from products.choices.car_data import CAR_MAP, BRAND_DISPLAY_NAMES, CAR_CHOICES, CATEGORY_KEYWORDS, CATEGORY_PATHS
-from .tasks import process_uploaded_json, manage_tmkb2b
+from .jobs import IMPORT_KIND_BY_FILE_NAME, stage_upload, enqueue_import
+from .pagination import wants_cursor_pagination, keyset_response, CachedCountPaginator
+from .counts import count_signature, part_count, wants_estimated_count
+from .search import PartSearchFilter
+from .lookup import lookup_parts, batch_part_details
+from .caching import brand_list, category_list, category_tree, part_detail
+from .listing import active_parts, filter_category, part_list_queryset
+from .facets import facet_counts
+from .export import EXPORT_CONTENT_TYPES, export_chunks, export_file_name
 
 from core.logs import CustomLogger
 logger = CustomLogger()
@@ -27,35 +36,52 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+    # views set these to serve the count from the count cache
+    count_signature = None
+    estimate_count = False
+
+    def django_paginator_class(self, object_list, per_page):
+        return CachedCountPaginator(
+            object_list, per_page, signature=self.count_signature, estimate=self.estimate_count
+        )
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_exact'] = self.page.paginator.count_exact
+        return response
+
 
 
 class JSONUploadAPIView(APIView):
+    """
+    Stage an uploaded feed and queue it as a background ImportJob.
+    Returns 202 with the job id; poll /api/import-jobs/<id>/ for its status.
+    """
+
     def post(self, request):
         try:
             serializer = JSONUploadSerializer(data=request.data)
             if serializer.is_valid():
                 file_obj = serializer.validated_data['file']
-                save_path = os.path.join(settings.BASE_DIR, 'models', 'jsonfile', file_obj.name)
-                os.makedirs(os.path.dirname(save_path), exist_ok=True)
-
-                with open(save_path, 'wb+') as destination:
-                    for chunk in file_obj.chunks():
-                        destination.write(chunk)
-
-                if file_obj.name == "allData.json":
-                    manage_tmkb2b(save_path)
-                elif file_obj.name == "final_output":
-                    process_uploaded_json(save_path)
-                else:
-                    pass
-                
-                if os.path.exists(save_path):
-                    os.remove(save_path)
+                kind = IMPORT_KIND_BY_FILE_NAME.get(file_obj.name)
+                if kind is None:
+                    return Response(
+                        {"error": f"Unsupported file: {file_obj.name}"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                options = {}
+                if kind == "catalog":
+                    options["deactivate_missing"] = serializer.validated_data['deactivate_missing']
+
+                save_path = stage_upload(file_obj)
+                job = enqueue_import(kind, file_obj.name, save_path, options)
 
                 return Response({
-                    "message": "File uploaded and processed successfully",
-                    "file_path": save_path
-                }, status=status.HTTP_201_CREATED)
+                    "message": "File uploaded and queued for import",
+                    "job_id": job.id,
+                    "status_url": reverse('import-job-detail', args=[job.id]),
+                }, status=status.HTTP_202_ACCEPTED)
 
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -70,12 +96,19 @@ class JSONUploadAPIView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+
+class ImportJobDetailAPIView(APIView):
+    def get(self, request, job_id):
+        try:
+            job = ImportJob.objects.get(id=job_id)
+        except ImportJob.DoesNotExist:
+            return Response({'error': 'Import job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_200_OK)
+
 class ListOfBrandsAPIView(APIView):
     def get(self, request):
         try:
-            brands = CarBrandsModel.objects.prefetch_related("cars").all()
-            serializer = CarBrandWithCarsSerializer(brands, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return Response(brand_list(), status=status.HTTP_200_OK)
         except Exception as e:
             logger.log(
                 module_name="products.views",
@@ -92,13 +125,12 @@ class CarPartsListAPIView(APIView):
     """
     Get paginated list of parts for a given car ID.
     Query Params: car_id, pageNumber, pageSize
+    Cursor mode: pagination="cursor" (or a cursor from a previous page), ordering, page_size
     """
 
     def post(self, request):
         try:
             car_id = request.data.get("car_id")
-            page_number = int(request.data.get("page_number", 1))
-            page_size = int(request.data.get("page_size", 10))
 
             if not car_id:
                 return Response({"error": "car_id is required."}, status=status.HTTP_400_BAD_REQUEST)
@@ -108,8 +140,16 @@ class CarPartsListAPIView(APIView):
             except CarsModel.DoesNotExist:
                 return Response({"error": "Car not found."}, status=status.HTTP_404_NOT_FOUND)
 
-            parts_qs = car.parts.all()
-            total_parts = parts_qs.count()
+            # ترتیب id مثل حالت cursor تا محتوای صفحه‌های offset پایدار باشد
+            parts_qs = PartSerializer.setup_eager_loading(car.parts.filter(is_active=True)).order_by('id')
+            if wants_cursor_pagination(request.data):
+                return keyset_response(parts_qs, request.data, PartSerializer)
+
+            page_number = int(request.data.get("page_number", 1))
+            page_size = int(request.data.get("page_size", 10))
+            total_parts, count_exact = part_count(
+                parts_qs, count_signature(car=car.id), estimate=wants_estimated_count(request.data)
+            )
 
             start = (page_number - 1) * page_size
             end = start + page_size
@@ -119,6 +159,7 @@ class CarPartsListAPIView(APIView):
 
             return Response({
                 "total_parts": total_parts,
+                "count_exact": count_exact,
                 "page": page_number,
                 "page_size": page_size,
                 "results": serializer.data
@@ -138,16 +179,34 @@ class CarPartsListAPIView(APIView):
 
 #--------------------------------------------------------------------------------------
 class AllPartsPaginatedAPIView(APIView):
+    '''
+        >>> GET /api/all/?pagenumber=2&pagesize=20
+        >>> GET /api/all/?pagenumber=2&count=estimated
+        >>> GET /api/all/?pagination=cursor&ordering=-price&pagesize=20
+        >>> GET /api/all/?cursor=<next or previous from the last response>
+    '''
     def get(self, request):
+        parts, serializer_class = active_parts()
+        if wants_cursor_pagination(request.query_params):
+            return keyset_response(
+                serializer_class.setup_eager_loading(parts), request.query_params, serializer_class,
+                page_size=request.query_params.get("pagesize")
+            )
+
         pagenumber = int(request.query_params.get("pagenumber", 1))
         pagesize = int(request.query_params.get("pagesize", 10))
         start = (pagenumber - 1) * pagesize
         end = start + pagesize
 
-        queryset = PartUnified.objects.all()
-        serialized = PartUnifiedSerializer(queryset[start:end], many=True)
+        serialized = serializer_class(
+            serializer_class.setup_eager_loading(parts.order_by('id'))[start:end], many=True
+        )
+        count, count_exact = part_count(
+            parts, count_signature(), estimate=wants_estimated_count(request.query_params)
+        )
         return Response({
-            "count": queryset.count(),
+            "count": count,
+            "count_exact": count_exact,
             "results": serialized.data
         })
 
@@ -159,24 +218,81 @@ class FilterByPartTypeAPIView(APIView):
         ('spare', 'Spare Part'),       
     )
 
+    Cursor mode: ?pagination=cursor (or ?cursor=...) with optional ordering and pagesize
     '''
     def post(self, request):
         part_type = request.data.get("part_type")
-        pagenumber = int(request.query_params.get("pagenumber", 1))
-        pagesize = int(request.query_params.get("pagesize", 10))
-        start = (pagenumber - 1) * pagesize
-        end = start + pagesize
 
         if part_type not in dict(PartUnified.PART_TYPE_CHOICES).keys():
             return Response({"error": "Invalid part_type"}, status=status.HTTP_400_BAD_REQUEST)
 
-        queryset = PartUnified.objects.filter(part_type=part_type)
-        serialized = PartUnifiedSerializer(queryset[start:end], many=True)
+        parts, serializer_class = active_parts()
+        parts = parts.filter(part_type=part_type)
+        if wants_cursor_pagination(request.query_params):
+            return keyset_response(
+                serializer_class.setup_eager_loading(parts), request.query_params, serializer_class,
+                page_size=request.query_params.get("pagesize")
+            )
+
+        pagenumber = int(request.query_params.get("pagenumber", 1))
+        pagesize = int(request.query_params.get("pagesize", 10))
+        start = (pagenumber - 1) * pagesize
+        end = start + pagesize
+        serialized = serializer_class(
+            serializer_class.setup_eager_loading(parts.order_by('id'))[start:end], many=True
+        )
+        count, count_exact = part_count(
+            parts, count_signature(part_type=part_type), estimate=wants_estimated_count(request.query_params)
+        )
         return Response({
-            "count": queryset.count(),
+            "count": count,
+            "count_exact": count_exact,
             "results": serialized.data
         })
 
+class PartCodeLookupAPIView(APIView):
+    '''
+    Exact or prefix lookup of one or many commercial/internal codes in a single indexed query;
+    prefix lookups return up to limit matches per prefix.
+        >>> POST /api/lookup-codes/ {"codes": ["2901000100", "1001"]}
+        >>> POST /api/lookup-codes/ {"codes": ["29010"], "mode": "prefix", "field": "commercial", "limit": 20}
+    '''
+    def post(self, request):
+        serializer = CodeLookupSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results, not_found = lookup_parts(**serializer.validated_data)
+        return Response({
+            "mode": serializer.validated_data['mode'],
+            "results": results,
+            "not_found": not_found,
+        }, status=status.HTTP_200_OK)
+
+class PartBatchDetailAPIView(APIView):
+    '''
+    Details of many parts (same payload as part/<id>/) by ids, commercial codes or both, in one query.
+        >>> POST /api/parts/batch/ {"ids": [12, 15], "codes": ["2901000103"]}
+    Results are keyed by the requested id or code; missing ones are null and listed in not_found.
+    '''
+    def post(self, request):
+        serializer = BatchPartDetailSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results, not_found = batch_part_details(**serializer.validated_data)
+        except Exception as e:
+            logger.log(
+                module_name="products.views",
+                class_name="PartBatchDetailAPIView",
+                message="Error fetching batch part details",
+                error=str(e)
+            )
+            return Response({"error": "An error occurred while fetching parts."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({"results": results, "not_found": not_found}, status=status.HTTP_200_OK)
+
 class PartDetailAPIView(APIView):
     """
     Retrieve a single PartUnified by ID.
@@ -185,12 +301,8 @@ class PartDetailAPIView(APIView):
 
     def get(self, request, part_id):
         try:
-            # Only fetch necessary fields to optimize DB access
-            part = PartUnified.objects.only(
-                'id', 'name', 'internal_code', 'commercial_code', 'price', 'part_type'
-            ).get(id=part_id)
-            serializer = PartUnifiedSerializer(part)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # Cached payload; built from exactly the fields, category and cars the serializer renders
+            return Response(part_detail(part_id), status=status.HTTP_200_OK)
         except PartUnified.DoesNotExist:
             return Response({'error': 'Part not found.'}, status=status.HTTP_404_NOT_FOUND)
         except ValueError:
@@ -211,29 +323,47 @@ class PartUnifiedListAPIView(generics.ListAPIView):
         >>> GET /api/parts/?page=2
         >>> GET /api/parts/?page=1&page_size=20
         >>> GET /api/parts/?search=شمع
+        >>> GET /api/parts/?search=پژو207   (ranked, prefix and Persian-normalized)
         >>> GET /api/parts/?ordering=price
         >>> GET /api/parts/?ordering=-inventory
+        >>> GET /api/parts/?price_min=100000&price_max=500000&ordering=price
+        >>> GET /api/parts/?category_id=3&in_stock=true&inventory_min=10
+        >>> GET /api/parts/?count=estimated
+        >>> GET /api/parts/?pagination=cursor&ordering=-price&page_size=20
+        >>> GET /api/parts/?cursor=<next or previous from the last response>
     '''
-    queryset = PartUnified.objects.all()
-    serializer_class = PartUnifiedSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [PartSearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'commercial_code', 'internal_code', 'category_title']
     ordering_fields = ['price', 'inventory']
     
+    def get_serializer_class(self):
+        return active_parts()[1]
+
     def get_queryset(self):
-        queryset = super().get_queryset()
-        category_id = self.request.query_params.get('category_id', None)
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
+        # ترتیب پیش‌فرض id؛ ordering و رتبه جستجو جایگزین آن می‌شوند
+        queryset, _, self.list_filters = part_list_queryset(self.request.query_params)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        if wants_cursor_pagination(request.query_params):
+            # ترتیب را خود cursor تعیین می‌کند؛ فقط فیلتر جستجو اعمال می‌شود
+            queryset = PartSearchFilter().filter_queryset(request, self.get_queryset(), self)
+            return keyset_response(queryset, request.query_params, self.get_serializer_class())
+        return super().list(request, *args, **kwargs)
+
+    def paginate_queryset(self, queryset):
+        params = self.request.query_params
+        # نتیجه جستجو cache نمی‌شود (تعداد عبارت‌های جستجو نامحدود است)
+        if not params.get('search'):
+            self.paginator.count_signature = count_signature(category=params.get('category_id'), **self.list_filters)
+        self.paginator.estimate_count = wants_estimated_count(params)
+        return super().paginate_queryset(queryset)
+
 class CategoryListAPIView(APIView):
     def get(self, request):
         try:
-            categories = PartCategory.objects.all()
-            serializer = CategorySerializer(categories, many=True)
-            return Response(serializer.data)
+            return Response(category_list())
         except Exception as e:
             logger.log(
                 module_name="products.views",
@@ -243,7 +373,90 @@ class CategoryListAPIView(APIView):
             )
             return Response({"error": "Category have error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class CategoryTreeAPIView(APIView):
+    '''
+    Nested category forest, built from one (tree_id, lft) ordered query and cached until the tree changes.
+        >>> GET /api/categories/tree/
+        >>> GET /api/categories/tree/?root=3&depth=1
+    '''
+    def get(self, request):
+        try:
+            depth = request.query_params.get('depth')
+            depth = int(depth) if depth not in (None, '') else None
+            if depth is not None and depth < 0:
+                raise ValueError
+        except ValueError:
+            return Response({"error": "depth must be a non-negative integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        root = None
+        root_id = request.query_params.get('root')
+        if root_id:
+            try:
+                root = PartCategory.objects.get(id=root_id)
+            except (PartCategory.DoesNotExist, ValueError):
+                return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            return Response(category_tree(root, depth), status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.log(
+                module_name="products.views",
+                class_name="CategoryTreeAPIView",
+                message="Error building category tree",
+                error=str(e)
+            )
+            return Response({"error": "Category tree have error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class FacetCountsAPIView(APIView):
+    '''
+    Part counts per part_type, turnover, has_warranty, top-level category, brand and car
+    for the current filter set (category_id covers its whole subtree), cached per filter set.
+        >>> GET /api/facets/
+        >>> GET /api/facets/?part_type=spare&brand_id=2&has_warranty=true
+    '''
+    def get(self, request):
+        serializer = FacetFilterSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(facet_counts(**serializer.validated_data), status=status.HTTP_200_OK)
+        except PartCategory.DoesNotExist:
+            return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.log(
+                module_name="products.views",
+                class_name="FacetCountsAPIView",
+                message="Error computing facet counts",
+                error=str(e)
+            )
+            return Response({"error": "Facets have error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PartExportAPIView(APIView):
+    '''
+    Whole catalog (active and inactive parts, with category path and car names) streamed
+    from one database cursor, instead of walking all-parts page by page.
+        >>> GET /api/parts/export/
+        >>> GET /api/parts/export/?output=csv&gzip=true
+        >>> GET /api/parts/export/?updated_since=2025-06-01T00:00:00Z
+    '''
+    def get(self, request):
+        serializer = PartExportSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        output = serializer.validated_data['output']
+        compress = serializer.validated_data['gzip']
+        response = StreamingHttpResponse(
+            export_chunks(output, compress, serializer.validated_data.get('updated_since')),
+            content_type='application/gzip' if compress else EXPORT_CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_file_name(output, compress)}"'
+        return response
+
 class ProductByCategoryAPIView(APIView):
+    '''
+        >>> POST /api/products_by_category/ {"id": 3, "page": 1, "page_size": 20}
+        >>> POST /api/products_by_category/ {"id": 1, "include_descendants": true}   (whole subtree)
+    '''
     def post(self, request):
         try:
             category_id = request.data.get('id')
@@ -255,7 +468,10 @@ class ProductByCategoryAPIView(APIView):
             except PartCategory.DoesNotExist:
                 return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
 
-            products = PartUnified.objects.filter(category=category).order_by('id')
+            include_descendants = request.data.get('include_descendants') in (True, 1, '1', 'true', 'True')
+            products, serializer_class = active_parts()
+            products = filter_category(products, category, include_descendants)
+            products = serializer_class.setup_eager_loading(products).order_by('id')
 
             # get page and page_size from body with defaults
             page_number = request.data.get('page', 1)
@@ -263,6 +479,11 @@ class ProductByCategoryAPIView(APIView):
 
             paginator = StandardResultsSetPagination()
             paginator.page_size = page_size  # override default page size if provided
+            # بعد از import این count ها از تعداد rolled-up درخت دسته‌بندی در cache هستند
+            paginator.count_signature = count_signature(
+                category=category.id, descendants=1 if include_descendants else None
+            )
+            paginator.estimate_count = wants_estimated_count(request.data)
 
             # Manually set query params for paginator, trick to set page number:
             request.query_params._mutable = True  # make query_params mutable temporarily
@@ -270,7 +491,7 @@ class ProductByCategoryAPIView(APIView):
             request.query_params._mutable = False
 
             result_page = paginator.paginate_queryset(products, request, view=self)
-            serializer = PartUnifiedSerializer(result_page, many=True)
+            serializer = serializer_class(result_page, many=True)
             return paginator.get_paginated_response(serializer.data)
         except Exception as e:
             logger.log(